@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
@@ -19,17 +20,31 @@ class LLMProviderSettings(BaseSettings):
     max_retries: int = 3
 
 
-class OpenAISettings(LLMProviderSettings):
+class OpenAIEmbeddingSettings(LLMProviderSettings):
+    """Batching and rate limit settings shared by the OpenAI and AzureOpenAI embedders."""
+
+    embedding_max_batch_size: int = 512  # API maximum: 2048 inputs per request
+    embedding_max_batch_tokens: int = 100_000  # API maximum: 300k tokens per request
+    embedding_concurrency: int = 4
+    requests_per_minute: int | None = 3000
+    tokens_per_minute: int | None = 1_000_000
+    retry_backoff_seconds: float = 1.0
+    # Truncated, re-normalised (Matryoshka) shortlist column; None to disable
+    short_embedding_dimension: int | None = 256
+
+
+class OpenAISettings(OpenAIEmbeddingSettings):
     """Settings for OpenAI."""
 
     api_key: str | None = os.getenv("OPENAI_API_KEY")
+    base_url: str | None = os.getenv("OPENAI_BASE_URL")
     default_model: str = "gpt-4o-mini-2024-07-18"
     embedding_model: str = "text-embedding-3-small"
     embedding_dimension: int = 1536
     embedding_column: str = "te3s_embedding"
 
 
-class AzureOpenAISettings(LLMProviderSettings):
+class AzureOpenAISettings(OpenAIEmbeddingSettings):
     """Settings for AzureOpenAI."""
 
     api_key: str | None = os.getenv("AZURE_OPENAI_API_KEY")
@@ -66,6 +81,16 @@ class StSettings(LLMProviderSettings):
     )
     embedding_dimension: int = 768
     embedding_column: str = "nfi_embedding"
+    # CPU throughput options
+    encode_batch_size: int = 32
+    sort_by_length: bool = True  # Encode texts of similar length together
+    num_processes: int = 1  # > 1 starts a multi-process encode pool on CPU
+    return_numpy: bool = False  # Return a float32 array instead of lists of floats
+    backend: str = "torch"  # "torch" or "onnx"
+    onnx_quantization: str | None = None  # e.g. "avx512_vnni", "avx2" or "arm64" (int8)
+    onnx_model_dir: str = str(  # Where quantized exports are stored
+        Path(__file__).resolve().parents[1] / "models" / "onnx"
+    )
 
 
 class LLMConfig(BaseSettings):
@@ -15,6 +15,8 @@ class Settings(BaseSettings):
     """Main settings for the application."""
 
     llm: LLMConfig = LLMConfig()
+    # Projector for the note plot: "umap" (UMAP.transform), "knn" or "linear" (see projectors)
+    note_projector: str = "umap"
 
 
 @lru_cache
@@ -0,0 +1,143 @@
+"""
+This module provides an asyncio variant of GardeniaClient on the asyncpg driver.
+AsyncGardeniaClient runs the queries for a client's profile, scenarios, notes and note
+statistics concurrently, so loading a client takes about as long as the slowest query.
+
+All coroutines run on one background event loop (see run_coroutine), so the pooled asyncpg
+connections stay bound to the same loop and synchronous code such as Streamlit can use them.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from backend.database.db_connection import Database
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# The note columns the UI uses; the embedding and tracking columns are not loaded
+NOTE_COLUMNS = "id, client_id, datetime, note"
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    # Start the shared background event loop on first use
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="gardenia-async-db", daemon=True
+            ).start()
+    return _loop
+
+
+def run_coroutine(coro, timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the shared background event loop and wait for its result.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+
+class AsyncGardeniaClient:
+    """
+    Asyncio counterpart of GardeniaClient that loads a client's data concurrently.
+    """
+
+    _engine: Optional[AsyncEngine] = None
+
+    def __init__(
+        self, client_id: str, client_details: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.client_id = client_id
+        self.client_details = client_details
+
+    @classmethod
+    def get_engine(cls) -> AsyncEngine:
+        # Get the process-wide asyncio engine for the configured database
+        if cls._engine is None:
+            cls._engine = Database().get_async_engine()
+        return cls._engine
+
+    async def _read_sql(
+        self, query: str, params: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Execute a SQL query on its own pooled connection and return a DataFrame.
+        """
+        async with self.get_engine().connect() as conn:
+            result = await conn.execute(text(query), params or {})
+            return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+    async def get_client_details(self) -> Optional[Dict[str, Any]]:
+        """
+        Fetch client details, unless they were passed in.
+        """
+        if self.client_details is not None:
+            return self.client_details
+        df = await self._read_sql(
+            "SELECT * FROM clients WHERE client_id = :client_id",
+            {"client_id": self.client_id},
+        )
+        self.client_details = df.iloc[0].to_dict() if not df.empty else None
+        return self.client_details
+
+    async def get_scenario(self) -> pd.DataFrame:
+        """
+        Fetch the scenarios of the client.
+        """
+        return await self._read_sql(
+            "SELECT * FROM scenarios WHERE client_id = :client_id",
+            {"client_id": self.client_id},
+        )
+
+    async def get_notes(self) -> pd.DataFrame:
+        """
+        Fetch all notes of the client (NOTE_COLUMNS only), ordered by datetime.
+        """
+        return await self._read_sql(
+            f"SELECT {NOTE_COLUMNS} FROM records WHERE client_id = :client_id ORDER BY datetime ASC",
+            {"client_id": self.client_id},
+        )
+
+    async def get_note_stats(self) -> Dict[str, Any]:
+        """
+        Fetch the number of notes and the first and last note datetime of the client.
+        """
+        df = await self._read_sql(
+            """SELECT COUNT(*) AS note_count, MIN(datetime) AS first_note, MAX(datetime) AS last_note
+            FROM records WHERE client_id = :client_id""",
+            {"client_id": self.client_id},
+        )
+        return df.iloc[0].to_dict()
+
+    async def load(self, include_notes: bool = True) -> Dict[str, Any]:
+        """
+        Fetch profile, scenarios, notes and note statistics concurrently.
+
+        Args:
+            include_notes (bool): Also fetch all notes; callers that page through the
+                notes themselves only need the statistics.
+
+        Returns:
+            Dict[str, Any]: Keys "details", "scenarios", "note_stats" and, with
+            include_notes, "notes".
+        """
+        queries = {
+            "details": self.get_client_details(),
+            "scenarios": self.get_scenario(),
+            "note_stats": self.get_note_stats(),
+        }
+        if include_notes:
+            queries["notes"] = self.get_notes()
+        results = await asyncio.gather(*queries.values())
+        return dict(zip(queries, results))
+
+
+# Example usage
+if __name__ == "__main__":
+    data = run_coroutine(AsyncGardeniaClient("mag003").load())
+    print(data["details"], data["note_stats"])
@@ -2,14 +2,202 @@
 This module provides a Database class for connecting to a PostgreSQL database using SQLAlchemy.
 It supports loading database connection parameters from environment variables or directly from arguments.
 The class includes methods to create a database engine and test the connection.
+
+Engines are kept in a process-wide registry keyed by connection URL, so every Database instance
+(and every caller) pointing at the same database shares one engine and its connection pool.
+Pool settings can be passed as arguments or set with the DB_POOL_SIZE, DB_MAX_OVERFLOW,
+DB_POOL_PRE_PING, DB_POOL_RECYCLE and DB_STATEMENT_TIMEOUT_MS environment variables.
+Connections from these engines return pgvector columns as float32 NumPy arrays.
+get_async_engine() / Database.get_async_engine() provide the same for asyncio code (asyncpg).
 """
 
 import os
-from typing import Optional
+import threading
+from typing import Any, Dict, Optional, Union
 
+from backend.database.vector_types import (
+    register_vector_type,
+    register_vector_type_asyncpg,
+)
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+# Process-wide engine registry, keyed by connection URL
+_engines: Dict[str, Union[Engine, AsyncEngine]] = {}
+_engines_lock = threading.Lock()
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    # Read an optional integer from the environment
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    # Read an optional boolean from the environment
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _engine_options(
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    pool_pre_ping: Optional[bool] = None,
+    pool_recycle: Optional[int] = None,
+) -> Dict[str, Any]:
+    # Resolve pool options from the arguments, falling back to the environment
+    return {
+        "pool_size": (
+            pool_size if pool_size is not None else _env_int("DB_POOL_SIZE", 5)
+        ),
+        "max_overflow": (
+            max_overflow
+            if max_overflow is not None
+            else _env_int("DB_MAX_OVERFLOW", 10)
+        ),
+        "pool_pre_ping": (
+            pool_pre_ping
+            if pool_pre_ping is not None
+            else _env_bool("DB_POOL_PRE_PING", True)
+        ),
+        "pool_recycle": (
+            pool_recycle
+            if pool_recycle is not None
+            else _env_int("DB_POOL_RECYCLE", 1800)
+        ),
+    }
+
+
+def _statement_timeout(statement_timeout_ms: Optional[int]) -> Optional[int]:
+    # Resolve the statement timeout from the argument or the environment
+    if statement_timeout_ms is not None:
+        return statement_timeout_ms
+    return _env_int("DB_STATEMENT_TIMEOUT_MS", None)
+
+
+def get_engine(
+    db_url: str,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    pool_pre_ping: Optional[bool] = None,
+    pool_recycle: Optional[int] = None,
+    statement_timeout_ms: Optional[int] = None,
+) -> Engine:
+    """
+    Return the shared engine for a connection URL, creating it on first use.
+
+    Pool options only take effect when the engine is created; later calls for
+    the same URL return the existing engine.
+
+    Args:
+        db_url (str): SQLAlchemy connection URL.
+        pool_size (int, optional): Number of connections kept open in the pool.
+        max_overflow (int, optional): Extra connections allowed beyond pool_size.
+        pool_pre_ping (bool, optional): Test connections before handing them out.
+        pool_recycle (int, optional): Recycle connections older than this (seconds).
+        statement_timeout_ms (int, optional): Server-side statement timeout.
+
+    Returns:
+        Engine: The shared SQLAlchemy engine.
+    """
+    engine = _engines.get(db_url)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            connect_args: Dict[str, Any] = {}
+            statement_timeout_ms = _statement_timeout(statement_timeout_ms)
+            if statement_timeout_ms:
+                connect_args["options"] = (
+                    f"-c statement_timeout={int(statement_timeout_ms)}"
+                )
+
+            engine = create_engine(
+                db_url,
+                connect_args=connect_args,
+                **_engine_options(pool_size, max_overflow, pool_pre_ping, pool_recycle),
+            )
+            # Return pgvector columns as NumPy arrays instead of text
+            event.listen(engine, "connect", register_vector_type)
+            _engines[db_url] = engine
+    return engine
+
+
+def get_async_engine(
+    db_url: str,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    pool_pre_ping: Optional[bool] = None,
+    pool_recycle: Optional[int] = None,
+    statement_timeout_ms: Optional[int] = None,
+) -> AsyncEngine:
+    """
+    Return the shared asyncio engine for an async connection URL (e.g. postgresql+asyncpg://).
+
+    Takes the same pool options as get_engine(). The engine's connections are bound to the
+    event loop they were created on, so use it from a single loop (see async_queries.run_coroutine).
+    """
+    engine = _engines.get(db_url)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            connect_args: Dict[str, Any] = {}
+            statement_timeout_ms = _statement_timeout(statement_timeout_ms)
+            if statement_timeout_ms:
+                connect_args["server_settings"] = {
+                    "statement_timeout": str(int(statement_timeout_ms))
+                }
+
+            engine = create_async_engine(
+                db_url,
+                connect_args=connect_args,
+                **_engine_options(pool_size, max_overflow, pool_pre_ping, pool_recycle),
+            )
+            # Decode pgvector columns from the binary protocol into NumPy arrays
+            event.listen(engine.sync_engine, "connect", register_vector_type_asyncpg)
+            _engines[db_url] = engine
+    return engine
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Return connection pool statistics for every registered engine.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Pool stats keyed by URL (password hidden).
+    """
+    stats = {}
+    for engine in list(_engines.values()):
+        pool = engine.pool
+        key = engine.url.render_as_string(hide_password=True)
+        stats[key] = {
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "checked_out": (pool.checkedout() if hasattr(pool, "checkedout") else None),
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "status": pool.status(),
+        }
+    return stats
+
+
+def dispose_engines() -> None:
+    """
+    Close all pooled connections and clear the engine registry.
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            # Async engines are disposed through their synchronous core
+            getattr(engine, "sync_engine", engine).dispose()
+        _engines.clear()
 
 
 class Database:
@@ -20,6 +208,7 @@ class Database:
         host: Optional[str] = None,
         port: Optional[str] = None,
         name: Optional[str] = None,
+        **pool_options: Any,
     ) -> None:
         # Load environment variables from a .env file
         load_dotenv()
@@ -29,18 +218,36 @@ class Database:
         self.host: Optional[str] = host or os.getenv("DB_HOST")
         self.port: Optional[str] = port or os.getenv("DB_PORT")
         self.name: Optional[str] = name or os.getenv("DB_NAME")
+        # Optional pool settings, see get_engine()
+        self.pool_options: Dict[str, Any] = pool_options
         self.engine: Optional[Engine] = None
 
+    @property
+    def url(self) -> str:
+        # psycopg2 is the driver in requirements.txt and is needed for COPY in the scripts
+        return f"postgresql+psycopg2://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
+
+    @property
+    def async_url(self) -> str:
+        # asyncpg driver for the asyncio data layer
+        return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
+
     def get_engine(self) -> Engine:
-        # Create a SQLAlchemy engine if it doesn't exist
+        # Get the shared engine for this database from the registry
         if not self.engine:
             try:
-                db_url = f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
-                self.engine = create_engine(db_url)
+                self.engine = get_engine(self.url, **self.pool_options)
             except Exception as e:
                 raise RuntimeError(f"Fout bij maken van engine: {e}") from e
         return self.engine
 
+    def get_async_engine(self) -> AsyncEngine:
+        # Get the shared asyncio engine for this database from the registry
+        try:
+            return get_async_engine(self.async_url, **self.pool_options)
+        except Exception as e:
+            raise RuntimeError(f"Fout bij maken van async engine: {e}") from e
+
     def test_connection(self) -> bool:
         # Test the database connection
         engine = self.get_engine()
@@ -61,3 +268,4 @@ class Database:
 if __name__ == "__main__":
     db = Database()
     db.test_connection()
+    print(get_pool_stats())
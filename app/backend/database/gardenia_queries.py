@@ -1,22 +1,31 @@
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
 # from database.db_connection import Database
 from backend.database.db_connection import Database
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 
 
 class GardeniaData:
     """Database loader for Gardenia data."""
 
-    # Create a database engine using the Database class
-    _engine = Database().get_engine()
+    # Shared database engine, looked up lazily from the engine registry on first use
+    _engine: Optional[Engine] = None
+
+    @classmethod
+    def get_engine(cls) -> Engine:
+        # Get the process-wide engine for the configured database
+        if cls._engine is None:
+            cls._engine = Database().get_engine()
+        return cls._engine
 
     @classmethod
     def _get_connection(cls):
         # Get a connection from the database engine
-        return cls._engine.connect()
+        return cls.get_engine().connect()
 
     @classmethod
     def run_query(
@@ -64,27 +73,82 @@ class GardeniaData:
 class GardeniaClients:
     """
     Class to manage and retrieve client data.
+
+    The clients table is loaded once and indexed by client_id and by ward, so
+    lookups are dictionary lookups instead of DataFrame scans. The index is
+    reloaded when it is older than ttl_seconds (None disables expiry).
     """
 
-    def __init__(self) -> None:
-        # Load all clients into a DataFrame
-        self.clients = GardeniaData.load_clients()
+    def __init__(self, ttl_seconds: Optional[float] = 300) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Reload all clients and rebuild the client_id and ward indexes.
+        """
+        clients = GardeniaData.load_clients()
+        clients_by_id: Dict[str, Dict[str, Any]] = {}
+        client_ids_by_ward: Dict[Any, List[str]] = {}
+        for record in clients.to_dict("records"):
+            clients_by_id[record["client_id"]] = record
+            client_ids_by_ward.setdefault(record["ward"], []).append(
+                record["client_id"]
+            )
+
+        # Swap in the new state at once so concurrent readers never see a partial index
+        self.clients = clients
+        self._clients_by_id = clients_by_id
+        self._client_ids_by_ward = client_ids_by_ward
+        self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self) -> None:
+        # Reload the index once it has expired
+        if (
+            self.ttl_seconds is not None
+            and time.monotonic() - self._loaded_at > self.ttl_seconds
+        ):
+            self.refresh()
 
     def get_client(self, client_id: str) -> "GardeniaClient":
         """
         Retrieve a specific client by their client_id.
         Returns a GardeniaClient object or None if the client is not found.
         """
-        row = self.clients[self.clients["client_id"] == client_id]
-        if row.empty:
+        self._ensure_fresh()
+        details = self._clients_by_id.get(client_id)
+        if details is None:
             return None
-        return GardeniaClient(client_id, row.iloc[0].to_dict())
+        return GardeniaClient(client_id, dict(details))
+
+    def get_wards(self) -> List[Any]:
+        """
+        Return all wards in the order they appear in the clients table.
+        """
+        self._ensure_fresh()
+        return list(self._client_ids_by_ward)
+
+    def get_client_ids(self, ward: Any) -> List[str]:
+        """
+        Return the client_ids of all clients in a ward.
+        """
+        self._ensure_fresh()
+        return list(self._client_ids_by_ward.get(ward, []))
+
+    def get_client_name(self, client_id: str) -> Optional[str]:
+        """
+        Return the name of a client, or None if the client is not found.
+        """
+        self._ensure_fresh()
+        details = self._clients_by_id.get(client_id)
+        return details.get("name") if details else None
 
     def get_random_client(self) -> "GardeniaClient":
         """
         Retrieve a random client from the loaded clients.
         Returns a GardeniaClient object.
         """
+        self._ensure_fresh()
         row = self.clients.sample().iloc[0]
         return GardeniaClient(row["client_id"], row.to_dict())
 
@@ -95,7 +159,7 @@ class GardeniaClient:
     """
 
     # Use the same database engine as GardeniaData
-    _engine = GardeniaData._engine
+    _get_connection = GardeniaData._get_connection
 
     def __init__(
         self, client_id: str, client_details: Optional[Dict[str, Any]] = None
@@ -136,7 +200,7 @@ class GardeniaClient:
         Returns a dictionary of client details or None if not found.
         """
         query = "SELECT * FROM clients WHERE client_id = :client_id"
-        with self._engine.connect() as conn:
+        with self._get_connection() as conn:
             df = pd.read_sql(text(query), conn, params={"client_id": self.client_id})
         return df.iloc[0].to_dict() if not df.empty else None
 
@@ -150,6 +214,19 @@ class GardeniaClient:
         if not self.client_details:
             return None
 
+        query, params = self._notes_query(start_date, end_date)
+        query += " ORDER BY datetime ASC"
+
+        with self._get_connection() as conn:
+            return pd.read_sql(text(query), conn, params=params)
+
+    def _notes_query(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the notes query for the client with optional date filters.
+        Returns the query (without ORDER BY) and its parameters.
+        """
         query = """
         SELECT * FROM records
         WHERE client_id = :client_id
@@ -167,11 +244,76 @@ class GardeniaClient:
             query += " AND datetime <= :end_date"
             params.update({"end_date": end_date})
 
-        query += " ORDER BY datetime ASC"
+        return query, params
+
+    def iter_notes(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream notes for the client as DataFrames of at most chunk_size rows.
+        Rows are read through a server-side cursor, so memory stays bounded by
+        the chunk size however wide the date range is.
+        """
+        if not self.client_details:
+            return
+
+        query, params = self._notes_query(start_date, end_date)
+        query += " ORDER BY datetime ASC, id ASC"
+
+        with self._get_connection() as conn:
+            conn = conn.execution_options(
+                stream_results=True, max_row_buffer=chunk_size
+            )
+            yield from pd.read_sql(
+                text(query), conn, params=params, chunksize=chunk_size
+            )
+
+    def get_notes_page(
+        self,
+        after: Optional[Tuple[Any, int]] = None,
+        limit: int = 50,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Retrieve one page of notes ordered by (datetime, id), using keyset pagination.
+
+        Args:
+            after (tuple, optional): (datetime, id) of the last note of the previous page.
+            limit (int): Maximum number of notes on the page.
+            start_date (str, optional): Start of the date range.
+            end_date (str, optional): End of the date range.
+
+        Returns:
+            pd.DataFrame: The page of notes, or None if no client details are available.
+            Pass page_cursor(page) as `after` to fetch the next page.
+        """
+        if not self.client_details:
+            return None
 
-        with self._engine.connect() as conn:
+        query, params = self._notes_query(start_date, end_date)
+        if after is not None:
+            query += " AND (datetime, id) > (:after_datetime, :after_id)"
+            params.update({"after_datetime": after[0], "after_id": int(after[1])})
+        query += " ORDER BY datetime ASC, id ASC LIMIT :limit"
+        params["limit"] = limit
+
+        with self._get_connection() as conn:
             return pd.read_sql(text(query), conn, params=params)
 
+    @staticmethod
+    def page_cursor(page: pd.DataFrame) -> Optional[Tuple[Any, int]]:
+        """
+        Return the (datetime, id) keyset cursor after the last note of a page.
+        """
+        if page is None or page.empty:
+            return None
+        last = page.iloc[-1]
+        return last["datetime"], int(last["id"])
+
     def get_scenario(self) -> Optional[pd.DataFrame]:
         """
         Retrieve the scenario associated with the client.
@@ -181,5 +323,5 @@ class GardeniaClient:
             return None
 
         query = "SELECT * FROM scenarios WHERE client_id = :client_id"
-        with self._engine.connect() as conn:
+        with self._get_connection() as conn:
             return pd.read_sql(text(query), conn, params={"client_id": self.client_id})
@@ -1,21 +1,107 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
 from sqlalchemy import text
 
+# pgvector operator class that serves each distance operator from an ANN index
+DISTANCE_OPCLASSES = {
+    "<->": "vector_l2_ops",
+    "<=>": "vector_cosine_ops",
+    "<#>": "vector_ip_ops",
+}
 
-def get_nearest_neighbors(
-    query_text: str,
-    table: str,
-    text_column: str,
-    embedding_factory,
-    engine,
-    limit: int = 5,
-    distance_op: str = "<->",
-    filters: dict = None,
-):
-    embedding = embedding_factory.create_embeddings(texts=[query_text])[0]
-    embedding_column = embedding_factory.get_embedding_column_name()
+# Compact companion columns next to a full-precision vector column. Each is derived in SQL
+# from the full vector: "suffix" and "type" are the companion's name suffix and SQL type,
+# "quantize" converts a vector expression, "distance_op" is the shortlist operator (None: the
+# query's own operator) and "opclasses" the operator class per operator for ANN indexes.
+# Besides these, "short<n>" (e.g. "short256") is a Matryoshka column holding the first n
+# dimensions, re-normalised; it suits models trained for truncation (text-embedding-3).
+QUANTIZATIONS = {
+    "halfvec": {
+        "suffix": "_half",
+        "type": "halfvec({dim})",
+        "quantize": "({expression})::halfvec",
+        "distance_op": None,
+        "opclasses": {
+            "<->": "halfvec_l2_ops",
+            "<=>": "halfvec_cosine_ops",
+            "<#>": "halfvec_ip_ops",
+        },
+    },
+    "binary": {
+        "suffix": "_bin",
+        "type": "bit({dim})",
+        "quantize": "binary_quantize({expression})",
+        "distance_op": "<~>",
+        "opclasses": {"<~>": "bit_hamming_ops"},
+    },
+}
+
+
+def _get_quantization(quantization: str) -> dict:
+    if quantization in QUANTIZATIONS:
+        return QUANTIZATIONS[quantization]
+    if quantization.startswith("short") and quantization[5:].isdigit():
+        dimension = int(quantization[5:])
+        return {
+            "suffix": f"_{dimension}",
+            "type": f"vector({dimension})",
+            "quantize": f"l2_normalize(subvector({{expression}}, 1, {dimension}))",
+            "distance_op": None,
+            "opclasses": DISTANCE_OPCLASSES,
+        }
+    raise ValueError(f"Unsupported quantization: {quantization}")
+
+
+def get_short_quantization(settings) -> Optional[str]:
+    """Return the Matryoshka quantization ("short<n>") configured for a provider, if any."""
+    dimension = getattr(settings, "short_embedding_dimension", None)
+    return f"short{dimension}" if dimension else None
+
+
+def _resolve_quantization(quantization: Optional[str], embedding_factory):
+    # "short" selects the provider's configured Matryoshka column
+    if quantization == "short":
+        quantization = get_short_quantization(embedding_factory.settings)
+        if quantization is None:
+            raise ValueError("The embedding provider has no short_embedding_dimension")
+    return quantization
+
+
+def get_companion_column(embedding_column: str, quantization: str) -> str:
+    """Return the name of the compact companion column, e.g. nfi_embedding_half."""
+    return embedding_column + _get_quantization(quantization)["suffix"]
+
+
+def get_companion_type(quantization: str, dimension: int) -> str:
+    """Return the SQL type of a companion column, e.g. halfvec(768)."""
+    return _get_quantization(quantization)["type"].format(dim=int(dimension))
 
+
+def quantize_sql(expression: str, quantization: str) -> str:
+    """Return SQL that converts a vector expression to the compact representation."""
+    return _get_quantization(quantization)["quantize"].format(expression=expression)
+
+
+def get_companion_opclass(quantization: str, distance_op: str = "<->") -> str:
+    """Return the operator class for an ANN index on a companion column."""
+    spec = _get_quantization(quantization)
+    return spec["opclasses"][spec["distance_op"] or distance_op]
+
+
+def _to_vector_literal(embedding: Sequence[float]) -> str:
+    """Format an embedding as a pgvector text literal, e.g. '[0.1,0.2]'."""
+    return "[" + ",".join(str(float(x)) for x in embedding) + "]"
+
+
+def _build_filter_clauses(filters: dict = None) -> Tuple[str, Dict]:
+    """
+    Translate a filters dict into an SQL snippet and its bind parameters.
+
+    A plain value becomes an equality filter; a list of (op, value) tuples
+    becomes one comparison per tuple, e.g. {"datetime": [(">=", a), ("<", b)]}.
+    """
     where_clauses = []
-    params = {"embedding": embedding, "limit": limit}
+    params = {}
 
     if filters:
         for i, (key, value) in enumerate(filters.items()):
@@ -30,6 +116,75 @@ def get_nearest_neighbors(
                 params[param_key] = value
 
     where_sql = " AND " + " AND ".join(where_clauses) if where_clauses else ""
+    return where_sql, params
+
+
+def _apply_search_settings(
+    conn,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    exact: bool = False,
+) -> None:
+    """
+    Apply per-query ANN tuning knobs for the current transaction only.
+
+    ef_search applies to HNSW indexes and probes to IVFFlat indexes; higher
+    values trade latency for recall. exact disables index scans so the query
+    runs as an exact sequential scan (the ground truth for recall).
+    """
+    settings = {}
+    if ef_search is not None:
+        settings["hnsw.ef_search"] = str(int(ef_search))
+    if probes is not None:
+        settings["ivfflat.probes"] = str(int(probes))
+    if exact:
+        settings["enable_indexscan"] = "off"
+        settings["enable_bitmapscan"] = "off"
+
+    for name, value in settings.items():
+        conn.execute(
+            text("SELECT set_config(:name, :value, true)"),
+            {"name": name, "value": value},
+        )
+
+
+def get_nearest_neighbors(
+    query_text: str,
+    table: str,
+    text_column: str,
+    embedding_factory,
+    engine,
+    limit: int = 5,
+    distance_op: str = "<->",
+    filters: dict = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    quantization: Optional[str] = None,
+    rerank_factor: int = 4,
+):
+    embedding = embedding_factory.create_embeddings(texts=[query_text])[0]
+    embedding_column = embedding_factory.get_embedding_column_name()
+    quantization = _resolve_quantization(quantization, embedding_factory)
+
+    if quantization:
+        # Two-stage: shortlist on the compact column, re-rank on the full vectors
+        return search_by_embeddings(
+            embeddings=[embedding],
+            table=table,
+            text_column=text_column,
+            embedding_column=embedding_column,
+            engine=engine,
+            limit=limit,
+            distance_op=distance_op,
+            filters=filters,
+            ef_search=ef_search,
+            probes=probes,
+            quantization=quantization,
+            rerank_factor=rerank_factor,
+        )[0]
+
+    where_sql, params = _build_filter_clauses(filters)
+    params.update({"embedding": _to_vector_literal(embedding), "limit": limit})
 
     sql = f"""
         SELECT id, {text_column}, ({embedding_column}) {distance_op} (:embedding)::vector AS similarity
@@ -41,5 +196,153 @@ def get_nearest_neighbors(
     """
 
     with engine.connect() as conn:
+        _apply_search_settings(conn, ef_search=ef_search, probes=probes)
         result = conn.execute(text(sql), params)
         return result.fetchall()
+
+
+def get_nearest_neighbors_batch(
+    query_texts: List[str],
+    table: str,
+    text_column: str,
+    embedding_factory,
+    engine,
+    limit: int = 5,
+    distance_op: str = "<->",
+    filters: dict = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    quantization: Optional[str] = None,
+    rerank_factor: int = 4,
+) -> List[list]:
+    """
+    Batched variant of get_nearest_neighbors for many queries with shared filters.
+
+    All query texts are embedded in a single create_embeddings call, and the
+    top-k per query is computed in one statement (see search_by_embeddings).
+
+    Args:
+        query_texts (List[str]): The query strings.
+        table (str): Table to search.
+        text_column (str): Text column returned with each match.
+        embedding_factory: EmbeddingFactory used to embed the queries.
+        engine: SQLAlchemy engine.
+        limit (int): Number of neighbours per query.
+        distance_op (str): pgvector distance operator.
+        filters (dict): Filters applied to every query (see _build_filter_clauses).
+        ef_search (int, optional): hnsw.ef_search for this query.
+        probes (int, optional): ivfflat.probes for this query.
+        quantization (str, optional): Shortlist on this companion column (see QUANTIZATIONS);
+            "short" uses the provider's Matryoshka column (coarse-to-fine search).
+        rerank_factor (int): Shortlist size as a multiple of limit.
+
+    Returns:
+        List[list]: One list of (id, text, similarity) rows per query, in input order.
+    """
+    if not query_texts:
+        return []
+
+    embeddings = embedding_factory.create_embeddings(texts=list(query_texts))
+    return search_by_embeddings(
+        embeddings=embeddings,
+        table=table,
+        text_column=text_column,
+        embedding_column=embedding_factory.get_embedding_column_name(),
+        engine=engine,
+        limit=limit,
+        distance_op=distance_op,
+        filters=filters,
+        ef_search=ef_search,
+        probes=probes,
+        quantization=_resolve_quantization(quantization, embedding_factory),
+        rerank_factor=rerank_factor,
+    )
+
+
+def search_by_embeddings(
+    embeddings: Sequence[Sequence[float]],
+    table: str,
+    text_column: str,
+    embedding_column: str,
+    engine,
+    limit: int = 5,
+    distance_op: str = "<->",
+    filters: dict = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    exact: bool = False,
+    quantization: Optional[str] = None,
+    rerank_factor: int = 4,
+) -> List[list]:
+    """
+    Return the top-k rows for each of the given query vectors in a single statement.
+
+    The query vectors are unnested into a relation and joined LATERALly
+    against the table, so the database runs one ORDER BY ... LIMIT per query
+    within a single round trip.
+
+    With a quantization, each query first shortlists limit * rerank_factor
+    candidates on the compact companion column (which can use its own, smaller
+    ANN index) and then re-ranks only those on the full-precision column.
+
+    Returns:
+        List[list]: One list of (id, text, similarity) rows per query vector.
+    """
+    if len(embeddings) == 0:
+        return []
+
+    where_sql, params = _build_filter_clauses(filters)
+    params.update(
+        {
+            "embeddings": [_to_vector_literal(e) for e in embeddings],
+            "limit": limit,
+            "candidates": limit * max(1, int(rerank_factor)),
+        }
+    )
+
+    # The text column is aliased, so any column (also "id") can be returned
+    text_value = f"{text_column} AS text_value"
+    if quantization:
+        spec = _get_quantization(quantization)
+        compact_column = get_companion_column(embedding_column, quantization)
+        compact_op = spec["distance_op"] or distance_op
+        source = f"""(
+                SELECT id, {text_value}, {embedding_column}
+                FROM {table}
+                WHERE 1=1
+                {where_sql}
+                ORDER BY ({compact_column}) {compact_op} {quantize_sql("queries.embedding", quantization)}
+                LIMIT :candidates
+            ) shortlist"""
+        where_sql = ""
+        text_value = "text_value"
+    else:
+        source = table
+
+    sql = f"""
+        WITH queries AS (
+            SELECT (q.ordinality - 1)::int AS query_idx, q.embedding::vector AS embedding
+            FROM unnest(CAST(:embeddings AS text[])) WITH ORDINALITY AS q(embedding, ordinality)
+        )
+        SELECT queries.query_idx, nn.id, nn.text_value, nn.similarity
+        FROM queries
+        CROSS JOIN LATERAL (
+            SELECT id, {text_value}, ({embedding_column}) {distance_op} queries.embedding AS similarity
+            FROM {source}
+            WHERE 1=1
+            {where_sql}
+            ORDER BY similarity ASC
+            LIMIT :limit
+        ) nn
+        ORDER BY queries.query_idx, nn.similarity ASC;
+    """
+
+    with engine.connect() as conn:
+        _apply_search_settings(conn, ef_search=ef_search, probes=probes, exact=exact)
+        rows = conn.execute(text(sql), params).fetchall()
+
+    # Group the flat result back into one list per query
+    results = [[] for _ in embeddings]
+    for query_idx, row_id, row_text, similarity in rows:
+        results[query_idx].append((row_id, row_text, similarity))
+    return results
@@ -0,0 +1,143 @@
+"""
+This module decodes pgvector values into float32 NumPy arrays.
+
+register_vector_type() installs a psycopg2 typecaster so vector columns come back as NumPy
+arrays instead of their text form. For bulk loads, select vector_send(<column>) to receive
+pgvector's binary representation and decode all rows at once into one contiguous 2-D matrix
+with fetch_embedding_matrix(). register_vector_type_asyncpg() does the same for asyncpg
+connections, which receive vectors over the binary protocol directly.
+"""
+
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# pgvector's binary header (int16 dim, int16 unused) is as wide as one float4
+_HEADER_FLOATS = 1
+
+
+def parse_vector_text(value: Optional[str], cursor: Any = None) -> Optional[np.ndarray]:
+    """
+    Parse pgvector's text form '[1,2,3]' into a float32 array.
+    The signature doubles as a psycopg2 typecaster.
+    """
+    if value is None:
+        return None
+    return np.array(value[1:-1].split(","), dtype=np.float32)
+
+
+def decode_vector_binary(value: Optional[bytes]) -> Optional[np.ndarray]:
+    """
+    Decode a single pgvector binary value (as returned by vector_send) into a float32 array.
+    """
+    if value is None:
+        return None
+    value = bytes(value)
+    dim = int.from_bytes(value[:2], "big")
+    return np.frombuffer(value, dtype=">f4", count=dim, offset=4).astype(np.float32)
+
+
+def decode_vector_matrix(values: List[bytes]) -> np.ndarray:
+    """
+    Decode a list of pgvector binary values of equal dimension into one (n, dim) float32 matrix.
+    All values are concatenated and converted in a single NumPy call.
+    """
+    if not values:
+        return np.empty((0, 0), dtype=np.float32)
+    buffer = b"".join(bytes(v) for v in values)
+    width = len(values[0]) // 4
+    matrix = np.frombuffer(buffer, dtype=">f4").reshape(len(values), width)
+    return matrix[:, _HEADER_FLOATS:].astype(np.float32)
+
+
+def register_vector_type(dbapi_connection, connection_record=None) -> None:
+    """
+    Register a typecaster on a psycopg2 connection that returns vector columns as NumPy arrays.
+    Can be used directly as a SQLAlchemy "connect" event listener; does nothing when the
+    vector extension is not installed.
+    """
+    try:
+        import psycopg2.extensions
+    except ImportError:
+        return
+
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT oid, typarray FROM pg_type WHERE typname = 'vector'")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        # Do not leave the lookup's transaction open on a fresh pooled connection
+        dbapi_connection.rollback()
+    if row is None:
+        return
+
+    vector_oid, array_oid = row
+    vector_type = psycopg2.extensions.new_type(
+        (vector_oid,), "VECTOR", parse_vector_text
+    )
+    psycopg2.extensions.register_type(vector_type, dbapi_connection)
+    psycopg2.extensions.register_type(
+        psycopg2.extensions.new_array_type((array_oid,), "VECTOR[]", vector_type),
+        dbapi_connection,
+    )
+
+
+def encode_vector_binary(value) -> bytes:
+    """
+    Encode a vector in pgvector's binary format (inverse of decode_vector_binary).
+    """
+    vector = np.asarray(value, dtype=">f4")
+    return struct.pack("!hh", len(vector), 0) + vector.tobytes()
+
+
+def register_vector_type_asyncpg(dbapi_connection, connection_record=None) -> None:
+    """
+    Register a binary-format vector codec on an asyncpg connection (SQLAlchemy's adapted
+    connection), so vector columns are decoded from the binary protocol into NumPy arrays.
+    Can be used as a "connect" event listener on AsyncEngine.sync_engine.
+    """
+
+    async def _register(conn) -> None:
+        try:
+            await conn.set_type_codec(
+                "vector",
+                encoder=encode_vector_binary,
+                decoder=decode_vector_binary,
+                format="binary",
+            )
+        except ValueError:
+            # The vector extension is not installed in this database
+            pass
+
+    dbapi_connection.run_async(_register)
+
+
+def fetch_embedding_matrix(
+    conn,
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    embedding_column: str = "embedding",
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Run a query that selects vector_send(<vector column>) AS <embedding_column> and
+    return the other columns as a DataFrame plus the embeddings as a (n, dim) matrix.
+    Rows without an embedding are dropped.
+
+    Args:
+        conn: SQLAlchemy connection.
+        query (str): SQL query.
+        params (dict, optional): Query parameters.
+        embedding_column (str): Name of the binary embedding column in the result.
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray]: Metadata rows and the aligned embedding matrix.
+    """
+    result = conn.execute(text(query), params or {})
+    df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    df = df[df[embedding_column].notna()].reset_index(drop=True)
+    matrix = decode_vector_matrix(df.pop(embedding_column).tolist())
+    return df, matrix
@@ -0,0 +1,174 @@
+"""
+Helpers for sending embedding requests to rate-limited APIs.
+
+- count tokens (tiktoken when installed, otherwise a character-based estimate)
+- split texts into sub-batches within an input count and token budget
+- a client-side rate limiter for requests/min and tokens/min
+- retry with exponential backoff on 429, 5xx and connection errors
+"""
+
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Errors without an HTTP status that are worth retrying
+_RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError", "ConnectionError")
+
+
+def make_token_counter(model: str) -> Callable[[str], int]:
+    """
+    Return a function that counts the tokens of a text for the given model.
+    Falls back to ~4 characters per token when tiktoken is not installed.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return lambda text: len(text) // 4 + 1
+
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def split_batches(
+    texts: Sequence[str],
+    max_batch_size: int,
+    max_batch_tokens: int,
+    count_tokens: Callable[[str], int],
+) -> List[Tuple[List[str], int]]:
+    """
+    Split texts, in order, into sub-batches of at most max_batch_size texts and
+    max_batch_tokens tokens. A single text over the token budget gets its own batch.
+
+    Returns:
+        List[Tuple[List[str], int]]: (texts, token count) per sub-batch.
+    """
+    batches = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and (
+            len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens
+        ):
+            batches.append((current, current_tokens))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append((current, current_tokens))
+    return batches
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter for requests per minute and tokens per minute.
+    acquire() blocks until both budgets allow the request. None disables a limit.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_budget = float(requests_per_minute or 0)
+        self._token_budget = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        # Add the budget accrued since the last update, up to one minute's worth
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._request_budget = min(
+                self.requests_per_minute,
+                self._request_budget + elapsed * self.requests_per_minute / 60,
+            )
+        if self.tokens_per_minute:
+            self._token_budget = min(
+                self.tokens_per_minute,
+                self._token_budget + elapsed * self.tokens_per_minute / 60,
+            )
+
+    def acquire(self, tokens: int = 0) -> None:
+        """
+        Block until one request of the given number of tokens fits in the budgets.
+        """
+        if self.tokens_per_minute:
+            # A request larger than the whole budget waits for a full bucket
+            tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                self._refill()
+                wait = 0.0
+                if self.requests_per_minute and self._request_budget < 1:
+                    wait = max(
+                        wait,
+                        (1 - self._request_budget) * 60 / self.requests_per_minute,
+                    )
+                if self.tokens_per_minute and self._token_budget < tokens:
+                    wait = max(
+                        wait,
+                        (tokens - self._token_budget) * 60 / self.tokens_per_minute,
+                    )
+                if wait == 0.0:
+                    if self.requests_per_minute:
+                        self._request_budget -= 1
+                    if self.tokens_per_minute:
+                        self._token_budget -= tokens
+                    return
+            time.sleep(wait)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Return True for rate limit (429), server (5xx) and connection errors.
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in _RETRYABLE_ERRORS
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    # Seconds from a Retry-After header on the error's response, if any
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    max_retries: int = 3,
+    backoff_seconds: float = 1.0,
+    max_backoff_seconds: float = 30.0,
+) -> T:
+    """
+    Call fn, retrying retryable errors with exponential backoff and jitter.
+    A Retry-After header from the server takes precedence over the backoff.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_backoff_seconds, backoff_seconds * 2**attempt)
+                delay *= random.uniform(0.5, 1.0)
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,193 @@
+"""
+Content-addressed cache for embeddings.
+
+Embeddings are keyed by (provider, model, dimension, sha256(text)). An in-memory LRU sits in
+front of an optional on-disk SQLite store holding the vectors as float32 blobs, so repeated
+texts are embedded only once, also across processes and runs. It is used through
+EmbeddingFactory(cache=...), which adds output-changing encode options to the model key;
+vector_search caches query embeddings only when given such a factory.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+CacheKey = Tuple[str, str, int, str]
+
+# SQLite's default limit on bound parameters per statement is 999
+_SQLITE_CHUNK = 200
+
+
+def text_hash(text: str) -> str:
+    """Return the sha256 hex digest of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache: an in-memory LRU backed by an optional SQLite file.
+
+    Attributes:
+        hits: Number of texts served from the cache.
+        misses: Number of texts that had to be embedded.
+    """
+
+    def __init__(
+        self, path: Optional[Union[str, Path]] = None, max_memory_items: int = 10000
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.max_memory_items = max_memory_items
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_store() if self.path else None
+
+    def _open_store(self) -> sqlite3.Connection:
+        # Open (and create) the on-disk store
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.path), check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (provider, model, dimension, text_hash)
+            )"""
+        )
+        db.commit()
+        return db
+
+    def _remember(self, key: CacheKey, vector: np.ndarray) -> None:
+        # Add to the in-memory LRU; caller holds the lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Sequence[CacheKey]) -> Dict[CacheKey, np.ndarray]:
+        """
+        Look up keys in memory, then on disk. Returns only the keys that were found.
+        """
+        found: Dict[CacheKey, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                else:
+                    missing.append(key)
+
+            if self._db is not None and missing:
+                # All keys of one call share provider, model and dimension
+                by_prefix: Dict[Tuple[str, str, int], List[str]] = {}
+                for provider, model, dimension, digest in missing:
+                    by_prefix.setdefault((provider, model, dimension), []).append(
+                        digest
+                    )
+                for (provider, model, dimension), digests in by_prefix.items():
+                    for i in range(0, len(digests), _SQLITE_CHUNK):
+                        chunk = digests[i : i + _SQLITE_CHUNK]
+                        rows = self._db.execute(
+                            f"""SELECT text_hash, vector FROM embeddings
+                            WHERE provider = ? AND model = ? AND dimension = ?
+                            AND text_hash IN ({",".join("?" * len(chunk))})""",
+                            (provider, model, dimension, *chunk),
+                        ).fetchall()
+                        for digest, blob in rows:
+                            key = (provider, model, dimension, digest)
+                            vector = np.frombuffer(blob, dtype=np.float32)
+                            self._remember(key, vector)
+                            found[key] = vector
+        return found
+
+    def put_many(self, items: Dict[CacheKey, np.ndarray]) -> None:
+        """
+        Store embeddings in memory and on disk.
+        """
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (*key, np.asarray(vector, dtype=np.float32).tobytes())
+                        for key, vector in items.items()
+                    ],
+                )
+                self._db.commit()
+
+    def get_or_create(
+        self,
+        provider: str,
+        model: str,
+        dimension: int,
+        texts: Sequence[str],
+        create: Callable[[List[str]], Sequence[Sequence[float]]],
+    ) -> List[np.ndarray]:
+        """
+        Return embeddings for texts, calling create() once for all unique cache misses.
+
+        Args:
+            provider (str): Embedding provider name.
+            model (str): Embedding model name.
+            dimension (int): Embedding dimension.
+            texts (Sequence[str]): Texts to embed.
+            create (Callable): Embeds a list of texts, e.g. a provider's create_embeddings.
+
+        Returns:
+            List[np.ndarray]: One float32 vector per text, in input order.
+        """
+        keys = [(provider, model, dimension, text_hash(t)) for t in texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+
+        # Embed every missing text once, even if it occurs several times in the batch
+        missing: Dict[CacheKey, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = create(list(missing.values()))
+            created = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, vectors)
+            }
+            self.put_many(created)
+            found.update(created)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return [found[key] for key in keys]
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return hit/miss counters and the hit rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_items": len(self._memory),
+        }
+
+    def close(self) -> None:
+        """
+        Close the on-disk store.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,9 +1,32 @@
+"""
+Embedding providers and the EmbeddingFactory.
+
+Providers are registered by name. Client libraries (openai, sentence_transformers and with it
+torch) are only imported when a provider is first constructed, so importing this module is cheap.
+"""
+
+import importlib
+import json
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, List
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type, Union
 
+import numpy as np
 from backend.config.settings import get_settings
-from openai import AzureOpenAI, OpenAI
-from sentence_transformers import SentenceTransformer
+from backend.llm.embedding_batching import (
+    RateLimiter,
+    call_with_retry,
+    make_token_counter,
+    split_batches,
+)
+from backend.llm.embedding_cache import EmbeddingCache
+from backend.llm.model_registry import get_model_registry
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 class EmbeddingProvider(ABC):
@@ -30,19 +53,55 @@ class EmbeddingProvider(ABC):
         pass
 
 
-class OpenAIEmbedder(EmbeddingProvider):
+class BatchingOpenAIEmbedder(EmbeddingProvider):
+    """
+    Base class for OpenAI-compatible embedders.
+
+    Input is split into sub-batches within the configured input count and token
+    budget, which are sent concurrently through a bounded thread pool. Requests
+    pass a client-side rate limiter (requests/min and tokens/min) and are retried
+    with backoff on 429, 5xx and connection errors. Output order matches input order.
+    """
+
     def __init__(self, settings):
         self.settings = settings
         self.client = self._initialize_client()
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=settings.requests_per_minute,
+            tokens_per_minute=settings.tokens_per_minute,
+        )
+        self.count_tokens = make_token_counter(settings.embedding_model)
 
-    def _initialize_client(self) -> Any:
-        return OpenAI(api_key=self.settings.api_key)
+    def create_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
+        batches = split_batches(
+            texts,
+            max_batch_size=self.settings.embedding_max_batch_size,
+            max_batch_tokens=self.settings.embedding_max_batch_tokens,
+            count_tokens=self.count_tokens,
+        )
+        if len(batches) <= 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            workers = min(self.settings.embedding_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # map() returns results in submission order
+                results = list(pool.map(self._embed_batch, batches))
+        return [embedding for result in results for embedding in result]
+
+    def _embed_batch(self, batch) -> List[List[float]]:
+        texts, tokens = batch
+        return call_with_retry(
+            lambda: self._request(texts, tokens),
+            max_retries=self.settings.max_retries,
+            backoff_seconds=self.settings.retry_backoff_seconds,
+        )
 
-    def create_embeddings(self, texts, **kwargs) -> List[List[float]]:
+    def _request(self, texts: List[str], tokens: int) -> List[List[float]]:
+        self.rate_limiter.acquire(tokens)
         response = self.client.embeddings.create(
             input=texts, model=self.settings.embedding_model
         )
-        return [r.embedding for r in response.data]
+        return [r.embedding for r in sorted(response.data, key=lambda r: r.index)]
 
     def get_dimension(self) -> int:
         return self.settings.embedding_dimension
@@ -51,41 +110,127 @@ class OpenAIEmbedder(EmbeddingProvider):
         return self.settings.embedding_column
 
 
-class AzureOpenAIEmbedder(EmbeddingProvider):
-    def __init__(self, settings):
-        self.settings = settings
-        self.client = self._initialize_client()
+class OpenAIEmbedder(BatchingOpenAIEmbedder):
+    def _initialize_client(self) -> Any:
+        from openai import OpenAI
+
+        # Retries are handled by call_with_retry
+        return OpenAI(
+            api_key=self.settings.api_key,
+            base_url=self.settings.base_url,
+            max_retries=0,
+        )
+
 
+class AzureOpenAIEmbedder(BatchingOpenAIEmbedder):
     def _initialize_client(self) -> Any:
+        from openai import AzureOpenAI
+
+        # Retries are handled by call_with_retry
         return AzureOpenAI(
             api_key=self.settings.api_key,
             api_version=self.settings.api_version,
             azure_endpoint=self.settings.azure_endpoint,
+            max_retries=0,
         )
 
-    def create_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
-        response = self.client.embeddings.create(
-            input=texts, model=self.settings.embedding_model
-        )
-        return [r.embedding for r in response.data]
-
-    def get_dimension(self) -> int:
-        return self.settings.embedding_dimension
-
-    def get_embedding_column_name(self) -> str:
-        return self.settings.embedding_column
-
 
 class SentenceTransformerEmbedder(EmbeddingProvider):
+    """
+    Sentence Transformer embedder with CPU throughput options (see StSettings):
+    length-sorted batching, an optional multi-process encode pool, float32 NumPy
+    output and an optional ONNX backend with int8 dynamic quantization.
+    """
+
     def __init__(self, settings):
         self.settings = settings
         self.client = self._initialize_client()
+        self._pool = None
+        # Instances are shared between threads through the model registry
+        self._lock = threading.Lock()
+        self.total_sentences = 0
+        self.total_seconds = 0.0
+
+    def _initialize_client(self) -> "SentenceTransformer":
+        from sentence_transformers import SentenceTransformer
+
+        if self.settings.backend != "onnx":
+            return SentenceTransformer(self.settings.embedding_model)
+        if not self.settings.onnx_quantization:
+            return SentenceTransformer(self.settings.embedding_model, backend="onnx")
+
+        # Export and quantize the ONNX model once, then load the int8 file
+        file_name = f"onnx/model_qint8_{self.settings.onnx_quantization}.onnx"
+        model_name = self.settings.embedding_model.replace("/", "__")
+        local_dir = Path(self.settings.onnx_model_dir) / model_name
+        if not (local_dir / file_name).exists():
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+
+            model = SentenceTransformer(self.settings.embedding_model, backend="onnx")
+            model.save_pretrained(str(local_dir))
+            export_dynamic_quantized_onnx_model(
+                model, self.settings.onnx_quantization, str(local_dir)
+            )
+        return SentenceTransformer(
+            str(local_dir), backend="onnx", model_kwargs={"file_name": file_name}
+        )
 
-    def _initialize_client(self) -> SentenceTransformer:
-        return SentenceTransformer(self.settings.embedding_model)
+    def _get_pool(self):
+        # Start the multi-process pool on first use
+        with self._lock:
+            if self._pool is None:
+                self._pool = self.client.start_multi_process_pool(
+                    target_devices=["cpu"] * self.settings.num_processes
+                )
+            return self._pool
 
     def create_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
-        return self.client.encode(texts, **kwargs).tolist()
+        if not texts:
+            if self.settings.return_numpy:
+                return np.empty((0, self.get_dimension()), dtype=np.float32)
+            return []
+        start = time.perf_counter()
+        # Sort by length so each batch pads to similar lengths; restored below
+        if self.settings.sort_by_length:
+            order = np.argsort([len(t) for t in texts], kind="stable")
+        else:
+            order = np.arange(len(texts))
+        sorted_texts = [texts[i] for i in order]
+        batch_size = kwargs.pop("batch_size", self.settings.encode_batch_size)
+        # The result is always encoded as NumPy and reordered below
+        kwargs.pop("convert_to_numpy", None)
+
+        if self.settings.num_processes > 1 and len(texts) > batch_size:
+            # encode_multi_process raises a TypeError for options it does not support
+            encoded = self.client.encode_multi_process(
+                sorted_texts, self._get_pool(), batch_size=batch_size, **kwargs
+            )
+        else:
+            encoded = self.client.encode(
+                sorted_texts, batch_size=batch_size, convert_to_numpy=True, **kwargs
+            )
+
+        embeddings = np.empty_like(encoded, dtype=np.float32)
+        embeddings[order] = encoded
+        with self._lock:
+            self.total_sentences += len(texts)
+            self.total_seconds += time.perf_counter() - start
+
+        if self.settings.return_numpy:
+            return embeddings
+        return embeddings.tolist()
+
+    @property
+    def sentences_per_sec(self) -> float:
+        """Average encoding throughput over all calls."""
+        return self.total_sentences / self.total_seconds if self.total_seconds else 0.0
+
+    def close(self) -> None:
+        """Stop the multi-process pool, if one was started."""
+        with self._lock:
+            if self._pool is not None:
+                self.client.stop_multi_process_pool(self._pool)
+                self._pool = None
 
     def get_dimension(self) -> int:
         return self.settings.embedding_dimension
@@ -94,26 +239,106 @@ class SentenceTransformerEmbedder(EmbeddingProvider):
         return self.settings.embedding_column
 
 
+# Embedding providers by name: a provider class, or a "module:Class" path that is
+# imported when the provider is first constructed
+_PROVIDERS: Dict[str, Union[str, Type[EmbeddingProvider]]] = {
+    "openai": OpenAIEmbedder,
+    "azureopenai": AzureOpenAIEmbedder,
+    "sentence_transformer": SentenceTransformerEmbedder,
+}
+
+
+def register_provider(name: str, provider: Union[str, Type[EmbeddingProvider]]) -> None:
+    """
+    Register an embedding provider under a name.
+
+    Args:
+        name (str): Name used as EmbeddingFactory(provider=name).
+        provider: EmbeddingProvider subclass, or "module:Class" to import it lazily.
+    """
+    _PROVIDERS[name] = provider
+
+
+def get_provider_class(name: str) -> Type[EmbeddingProvider]:
+    """
+    Return the provider class registered under a name, importing it if needed.
+    """
+    provider = _PROVIDERS.get(name)
+    if provider is None:
+        raise ValueError(f"Unsupported Embedding provider: {name}")
+    if isinstance(provider, str):
+        module_name, class_name = provider.split(":")
+        provider = getattr(importlib.import_module(module_name), class_name)
+        _PROVIDERS[name] = provider
+    return provider
+
+
+def available_providers() -> List[str]:
+    """
+    Return the names of all registered embedding providers.
+    """
+    return list(_PROVIDERS)
+
+
+# Encode options that do not change the vectors; all others are part of the cache key
+CACHE_NEUTRAL_OPTIONS = {"batch_size", "show_progress_bar"}
+
+
 class EmbeddingFactory:
-    def __init__(self, provider: str):
+    def __init__(
+        self,
+        provider: str,
+        cache: Optional[EmbeddingCache] = None,
+        settings: Optional[Any] = None,
+        shared: bool = True,
+    ):
         self.provider = provider
-        settings = get_settings()
-        self.settings = getattr(settings.llm, provider)
+        # Share one provider instance (and loaded model) per settings in this process
+        self.shared = shared
+        # Settings come from the application config unless passed explicitly
+        self.settings = settings or getattr(get_settings().llm, provider)
         self.embedding_provider = self._create_provider()
+        # Optional content-addressed cache; only cache misses reach the provider
+        self.cache = cache
 
     def _create_provider(self) -> EmbeddingProvider:
-        providers = {
-            "openai": OpenAIEmbedder,
-            "azureopenai": AzureOpenAIEmbedder,
-            "sentence_transformer": SentenceTransformerEmbedder,
-        }
-        provider_class = providers.get(self.provider)
-        if provider_class:
+        provider_class = get_provider_class(self.provider)
+        if not self.shared:
             return provider_class(self.settings)
-        raise ValueError(f"Unsupported Embedding provider: {self.provider}")
+        return get_model_registry().get_or_create(
+            "embedding",
+            self.provider,
+            self.settings,
+            lambda: provider_class(self.settings),
+        )
+
+    def _cache_model_key(self, options: Dict[str, Any]) -> str:
+        # The model part of the cache key, extended with options that affect the output
+        options = {k: v for k, v in options.items() if k not in CACHE_NEUTRAL_OPTIONS}
+        if not options:
+            return self.settings.embedding_model
+        return f"{self.settings.embedding_model}?{json.dumps(options, sort_keys=True, default=repr)}"
 
     def create_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
-        return self.embedding_provider.create_embeddings(texts, **kwargs)
+        if self.cache is None:
+            return self.embedding_provider.create_embeddings(texts, **kwargs)
+        if not texts:
+            if getattr(self.settings, "return_numpy", False):
+                return np.empty((0, self.get_dimension()), dtype=np.float32)
+            return []
+
+        vectors = self.cache.get_or_create(
+            provider=self.provider,
+            model=self._cache_model_key(kwargs),
+            dimension=self.get_dimension(),
+            texts=texts,
+            create=lambda missing: self.embedding_provider.create_embeddings(
+                missing, **kwargs
+            ),
+        )
+        if getattr(self.settings, "return_numpy", False):
+            return np.vstack(vectors)
+        return [vector.tolist() for vector in vectors]
 
     def get_dimension(self) -> int:
         return self.embedding_provider.get_dimension()
@@ -121,6 +346,13 @@ class EmbeddingFactory:
     def get_embedding_column_name(self) -> str:
         return self.settings.embedding_column
 
+    def get_model_version(self) -> str:
+        """
+        Identify the model that produces the embeddings, e.g. "text-embedding-3-small@1536".
+        Stored next to each embedding, so rows are re-embedded when it changes.
+        """
+        return f"{self.settings.embedding_model}@{self.get_dimension()}"
+
 
 # Example usage
 if __name__ == "__main__":
@@ -128,3 +360,4 @@ if __name__ == "__main__":
     texts = ["Hallo, ik heet Eva."]
     embeddings = factory.create_embeddings(texts)
     print(embeddings)
+    print(f"{factory.embedding_provider.sentences_per_sec:.1f} sentences/sec")
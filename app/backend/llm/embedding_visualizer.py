@@ -3,6 +3,7 @@ import base64
 import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import plotly.io as pio
 
 
@@ -83,32 +84,13 @@ def create_interactive_plot(
     return fig
 
 
-def plot_client_embeddings(df_plot, background_image_path):
-    """Plot the embeddings with animation and background image."""
-    background_image_base64 = encode_image(background_image_path)
-
-    # Copy all rows to the minimum time_diff
-    min_time_diff = df_plot["time_diff"].max()
-    df_copy = df_plot.copy()
-    df_copy["time_diff"] = min_time_diff
-    df_plot = pd.concat([df_plot, df_copy], ignore_index=True)
-
-    fig = px.scatter(
-        df_plot,
-        x="x",
-        y="y",
-        hover_data={"text": True, "datetime": True},
-        title=f"Reports of {df_plot['name'].iloc[0]}",
-        animation_frame="time_diff",
-        animation_group="text",
-        labels={"time_diff": "Time (days)"},
-    )
-
+def _style_client_plot(fig, background_image_source):
+    """Apply the background image, axes and layout shared by the client plots."""
     # Voeg achtergrondafbeelding toe
     fig.update_layout(
         images=[
             dict(
-                source=str(background_image_base64),
+                source=str(background_image_source),
                 xref="x",
                 yref="y",
                 x=-6,
@@ -154,7 +136,151 @@ def plot_client_embeddings(df_plot, background_image_path):
         paper_bgcolor="white",
     )
 
+
+def _empty_client_plot(background_image_source):
+    """Styled plot without points, for a client without projected notes."""
+    fig = go.Figure(layout=dict(title="No projected reports"))
+    _style_client_plot(fig, background_image_source)
+    return fig
+
+
+def plot_client_embeddings(df_plot, background_image_path):
+    """Plot the embeddings with animation and background image."""
+    background_image_base64 = encode_image(background_image_path)
+    if df_plot.empty:
+        return _empty_client_plot(background_image_base64)
+
+    # Copy all rows to the minimum time_diff
+    min_time_diff = df_plot["time_diff"].max()
+    df_copy = df_plot.copy()
+    df_copy["time_diff"] = min_time_diff
+    df_plot = pd.concat([df_plot, df_copy], ignore_index=True)
+
+    fig = px.scatter(
+        df_plot,
+        x="x",
+        y="y",
+        hover_data={"text": True, "datetime": True},
+        title=f"Reports of {df_plot['name'].iloc[0]}",
+        animation_frame="time_diff",
+        animation_group="text",
+        labels={"time_diff": "Time (days)"},
+    )
+
+    _style_client_plot(fig, background_image_base64)
+
     # Pas de animatiesnelheid aan
     fig.layout.updatemenus[0].buttons[0].args[1]["frame"]["duration"] = 50
 
     return fig
+
+
+def _client_points_trace(df):
+    # One WebGL trace with rounded coordinates and a compact hover text
+    return go.Scattergl(
+        x=df["x"].round(3),
+        y=df["y"].round(3),
+        text=df["text"],
+        customdata=df["datetime"].dt.strftime("%Y-%m-%d %H:%M"),
+        mode="markers",
+        marker=dict(color="#636EFA"),
+        hovertemplate="%{text}<br>%{customdata}<extra></extra>",
+    )
+
+
+def plot_client_embeddings_compact(
+    df_plot, background_image_source, bucket_days=7, frame_duration=200
+):
+    """Lightweight variant of plot_client_embeddings for the dashboard.
+
+    Notes are grouped into one animation frame per bucket_days days and drawn with WebGL
+    (scattergl). The last frame shows all notes without copying the DataFrame. The
+    background is referenced by URL (e.g. a Streamlit static file) instead of inlined.
+
+    Args:
+        df_plot (pd.DataFrame): Columns x, y, text, datetime, time_diff and name.
+        background_image_source (str): URL or data URI of the background image.
+        bucket_days (int): Number of days per animation frame.
+        frame_duration (int): Frame duration in milliseconds.
+
+    Returns:
+        plotly.graph_objects.Figure: The animated scatter plot.
+    """
+    if df_plot.empty:
+        return _empty_client_plot(background_image_source)
+
+    buckets = (df_plot["time_diff"] // bucket_days) * bucket_days
+    frame_values = sorted(buckets.unique())
+
+    frames = []
+    for value in frame_values:
+        # The last frame shows all notes, like plot_client_embeddings
+        df_frame = df_plot if value == frame_values[-1] else df_plot[buckets == value]
+        frames.append(go.Frame(name=str(value), data=[_client_points_trace(df_frame)]))
+
+    animation = dict(mode="immediate", transition=dict(duration=0))
+    fig = go.Figure(
+        data=frames[0].data,
+        frames=frames,
+        layout=dict(
+            title=f"Reports of {df_plot['name'].iloc[0]}",
+            showlegend=False,
+            updatemenus=[
+                dict(
+                    type="buttons",
+                    direction="left",
+                    showactive=False,
+                    x=0.1,
+                    y=0,
+                    xanchor="right",
+                    yanchor="top",
+                    pad=dict(r=10, t=70),
+                    buttons=[
+                        dict(
+                            label="&#9654;",
+                            method="animate",
+                            args=[
+                                None,
+                                dict(
+                                    animation,
+                                    fromcurrent=True,
+                                    frame=dict(duration=frame_duration, redraw=True),
+                                ),
+                            ],
+                        ),
+                        dict(
+                            label="&#9724;",
+                            method="animate",
+                            args=[
+                                [None],
+                                dict(animation, frame=dict(duration=0, redraw=True)),
+                            ],
+                        ),
+                    ],
+                )
+            ],
+            sliders=[
+                dict(
+                    active=0,
+                    x=0.1,
+                    len=0.9,
+                    pad=dict(b=10, t=60),
+                    currentvalue=dict(prefix="Time (days)="),
+                    steps=[
+                        dict(
+                            label=str(value),
+                            method="animate",
+                            args=[
+                                [str(value)],
+                                dict(animation, frame=dict(duration=0, redraw=True)),
+                            ],
+                        )
+                        for value in frame_values
+                    ],
+                )
+            ],
+        ),
+    )
+
+    _style_client_plot(fig, background_image_source)
+    return fig
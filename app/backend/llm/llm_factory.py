@@ -3,11 +3,11 @@ from typing import Any, Dict, List, Tuple, Type
 
 import instructor
 from anthropic import Anthropic
+from backend.config.settings import get_settings
+from backend.llm.model_registry import get_model_registry
 from openai import AzureOpenAI, OpenAI
 from pydantic import BaseModel
 
-from config.settings import get_settings
-
 """
 LLM Provider Factory Module
 
@@ -157,11 +157,13 @@ class LLMFactory:
     Attributes:
         provider: The name of the LLM provider to use
         settings: Configuration settings for the LLM provider
-        llm_provider: The initialized LLM provider instance
+        llm_provider: The initialized LLM provider instance, shared through the model
+            registry with other factories using the same settings unless shared=False
     """
 
-    def __init__(self, provider: str):
+    def __init__(self, provider: str, shared: bool = True):
         self.provider = provider
+        self.shared = shared
         settings = get_settings()
         self.settings = getattr(settings.llm, provider)
         self.llm_provider = self._create_provider()
@@ -174,9 +176,13 @@ class LLMFactory:
             "azureopenai": AzureOpenAIProvider,
         }
         provider_class = providers.get(self.provider)
-        if provider_class:
+        if not provider_class:
+            raise ValueError(f"Unsupported LLM provider: {self.provider}")
+        if not self.shared:
             return provider_class(self.settings)
-        raise ValueError(f"Unsupported LLM provider: {self.provider}")
+        return get_model_registry().get_or_create(
+            "llm", self.provider, self.settings, lambda: provider_class(self.settings)
+        )
 
     def create_completion(
         self, response_model: Type[BaseModel], messages: List[Dict[str, str]], **kwargs
@@ -0,0 +1,219 @@
+"""
+Process-wide registry of loaded model and client instances.
+
+EmbeddingFactory and LLMFactory get their provider instances from here, so every factory in a
+process (Streamlit sessions, script threads) with the same settings shares one loaded model
+instead of reloading weights per factory. Instances are keyed by (kind, provider, settings) and
+created at most once, also when several threads ask for the same key at the same time.
+The registry records load time and approximate memory per instance; warmup() loads models and
+runs a dummy batch ahead of the first real request.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+RegistryKey = Tuple[str, str, str]
+
+
+def get_rss_bytes() -> Optional[int]:
+    """Return the resident set size of the process, if it can be determined."""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _parameter_bytes(instance: Any) -> Optional[int]:
+    # Size of a torch model's parameters and buffers (e.g. a SentenceTransformer client)
+    model = getattr(instance, "client", instance)
+    if not hasattr(model, "parameters"):
+        return None
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return None
+
+
+def settings_key(settings: Any) -> str:
+    """
+    Return a stable digest of a settings object, used to tell instances apart.
+    """
+    if hasattr(settings, "model_dump"):
+        payload = json.dumps(settings.model_dump(), sort_keys=True, default=str)
+    else:
+        payload = repr(settings)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class RegistryEntry:
+    """A loaded instance with its load statistics."""
+
+    kind: str
+    provider: str
+    model: Optional[str]
+    instance: Any = None
+    load_seconds: float = 0.0
+    rss_delta_bytes: Optional[int] = None
+    parameter_bytes: Optional[int] = None
+    warmup_seconds: Optional[float] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class ModelRegistry:
+    """
+    Thread-safe registry that creates each (kind, provider, settings) instance once.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[RegistryKey, RegistryEntry] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(
+        self, kind: str, provider: str, settings: Any, create: Callable[[], Any]
+    ) -> Any:
+        """
+        Return the shared instance for (kind, provider, settings), creating it on first use.
+
+        Args:
+            kind (str): Kind of instance, e.g. "embedding" or "llm".
+            provider (str): Provider name.
+            settings: Provider settings; instances with different settings are kept apart.
+            create (Callable): Builds the instance, called at most once per key.
+
+        Returns:
+            Any: The shared instance.
+        """
+        key = (kind, provider, settings_key(settings))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = RegistryEntry(
+                    kind=kind,
+                    provider=provider,
+                    model=getattr(settings, "embedding_model", None)
+                    or getattr(settings, "default_model", None),
+                )
+                self._entries[key] = entry
+
+        # Load outside the registry lock, so other models can load at the same time
+        with entry.lock:
+            if entry.instance is None:
+                rss_before = get_rss_bytes()
+                start = time.perf_counter()
+                instance = create()
+                entry.load_seconds = time.perf_counter() - start
+                rss_after = get_rss_bytes()
+                if rss_before is not None and rss_after is not None:
+                    entry.rss_delta_bytes = rss_after - rss_before
+                entry.parameter_bytes = _parameter_bytes(instance)
+                entry.instance = instance
+        return entry.instance
+
+    def _find(self, instance: Any) -> Optional[RegistryEntry]:
+        with self._lock:
+            return next(
+                (e for e in self._entries.values() if e.instance is instance), None
+            )
+
+    def record_warmup(self, instance: Any, seconds: float) -> None:
+        """
+        Record the duration of the warmup batch of a registered instance.
+        """
+        entry = self._find(instance)
+        if entry is not None:
+            entry.warmup_seconds = seconds
+
+    def memory_report(self) -> List[Dict[str, Any]]:
+        """
+        Return load time and memory statistics per loaded instance.
+
+        rss_delta_bytes is the growth of the process's resident memory while the instance
+        loaded; it is approximate when models load concurrently. parameter_bytes is the size
+        of a torch model's weights.
+        """
+        with self._lock:
+            entries = [e for e in self._entries.values() if e.instance is not None]
+        return [
+            {
+                "kind": e.kind,
+                "provider": e.provider,
+                "model": e.model,
+                "load_seconds": e.load_seconds,
+                "warmup_seconds": e.warmup_seconds,
+                "rss_delta_bytes": e.rss_delta_bytes,
+                "parameter_bytes": e.parameter_bytes,
+            }
+            for e in entries
+        ]
+
+    def clear(self) -> None:
+        """
+        Drop all instances, closing those that have a close() method.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            close = getattr(entry.instance, "close", None)
+            if callable(close):
+                close()
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Return the process-wide model registry.
+    """
+    return _registry
+
+
+def warmup(
+    embedding_providers: Iterable[str] = ("sentence_transformer",),
+    llm_providers: Iterable[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Load models ahead of the first request.
+
+    Embedding providers are loaded and run on a dummy batch, so lazy initialisation (e.g. the
+    first torch forward pass) is paid here. LLM clients are only constructed, as a dummy
+    completion would cost an API call.
+
+    Returns:
+        List[Dict[str, Any]]: The registry's memory report.
+    """
+    from backend.llm.embedding_factory import EmbeddingFactory
+
+    for provider in embedding_providers:
+        factory = EmbeddingFactory(provider=provider)
+        start = time.perf_counter()
+        factory.embedding_provider.create_embeddings(["Warmup."])
+        _registry.record_warmup(factory.embedding_provider, time.perf_counter() - start)
+    llm_providers = list(llm_providers)
+    if llm_providers:
+        from backend.llm.llm_factory import LLMFactory
+
+        for provider in llm_providers:
+            LLMFactory(provider=provider)
+    return _registry.memory_report()
+
+
+# Example usage
+if __name__ == "__main__":
+    for row in warmup():
+        print(row)
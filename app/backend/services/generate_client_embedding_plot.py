@@ -1,81 +1,183 @@
-import ast
 from pathlib import Path
 
-import joblib
-import numpy as np
 import pandas as pd
 import plotly.io as pio
 from backend.database.db_connection import Database
-from backend.llm.embedding_visualizer import plot_client_embeddings
-from sqlalchemy import text
-
-# Paths to required models and output files
+from backend.llm.embedding_visualizer import (
+    plot_client_embeddings,
+    plot_client_embeddings_compact,
+)
+from backend.services.note_projections import (
+    get_client_data_version,
+    get_client_projections,
+    get_reducer_version,
+)
+from backend.services.plot_cache import PlotCache
+
+# Paths to required files
 root = Path(__file__).resolve().parents[2]
-umap_model_path = root / "backend" / "models" / "notes_umap_2d.pkl"
-topic_map_path = root / "backend" / "static" / "topic_map.png"
-client_plot_html_path = root / "backend" / "static" / "output" / "client_plot.html"
+# The background is served by Streamlit as a static file (see .streamlit/config.toml)
+topic_map_path = root / "frontend" / "static" / "topic_map.png"
+topic_map_url = "app/static/topic_map.png"
+plot_cache_folder = root / "backend" / "static" / "output" / "plots"
 
+# Days per animation frame in the compact plot
+FRAME_BUCKET_DAYS = 7
 
-def create_client_embedding_plot(client_id: str):
+# Rendered plots per client, reused until the client's notes or the reducer change
+plot_cache = PlotCache(plot_cache_folder)
+figure_cache = PlotCache(plot_cache_folder, suffix=".json")
+
+
+def get_client_plot_data(engine, client_id: str) -> pd.DataFrame:
     """
-    Prepares a 2D embedding plot for a specific client based on their notes and embeddings.
+    Fetches the plot data of a client: x, y, text, datetime, time_diff and name per note.
+    """
+    # Fetch the precomputed 2D coordinates of the client's notes (see note_projections);
+    # only notes without a current projection are run through UMAP
+    df = get_client_projections(engine, client_id)
+
+    # Drop rows with missing values
+    df = df.dropna().reset_index(drop=True)
+
+    # Create a DataFrame for plotting
+    df_plot = df[["x", "y"]].copy()
+    df_plot["text"] = df["note"]  # Add note text for hover information
+    df_plot["datetime"] = pd.to_datetime(df["datetime"])  # Convert datetime column
+    df_plot["time_diff"] = (
+        df_plot["datetime"] - df_plot["datetime"].min()
+    ).dt.days  # Calculate time difference
+    df_plot["name"] = df["name"].iloc[0] if not df.empty else None  # Add client name
+    return df_plot
+
+
+def build_client_embedding_figure(
+    engine, client_id: str, compact: bool = False, bucket_days: int = FRAME_BUCKET_DAYS
+):
+    """
+    Builds the 2D embedding figure for a specific client from the projected notes.
 
     Args:
+        engine: SQLAlchemy engine.
         client_id (str): The ID of the client.
+        compact (bool): Build the lightweight dashboard variant (scattergl, frames per
+            bucket_days days, background by static URL) instead of the standalone one.
+        bucket_days (int): Days per animation frame in the compact variant.
 
     Returns:
-        str: Path to the generated HTML file containing the plot.
+        plotly.graph_objects.Figure: The plot.
     """
-    # Initialize database connection
-    engine = Database().get_engine()
+    df_plot = get_client_plot_data(engine, client_id)
 
-    # SQL query to fetch client records and embeddings
-    query = f"""SELECT r.id, r.client_id, r.note, r.nfi_embedding as embedding, r.datetime, c.name
-FROM records r
-LEFT JOIN clients c ON r.client_id = c.client_id
-WHERE r.client_id = '{client_id}'
-ORDER BY r.datetime;
-"""
+    # Generate the plot using the embedding visualizer
+    if compact:
+        return plot_client_embeddings_compact(
+            df_plot, topic_map_url, bucket_days=bucket_days
+        )
+    return plot_client_embeddings(df_plot, topic_map_path)
 
-    # Execute the query and load results into a DataFrame
-    with engine.connect() as conn:
-        df = pd.read_sql(text(query), conn)
 
-    # Drop rows with missing values
-    df.dropna(inplace=True)
+def get_client_plot_key(engine, client_id: str) -> str:
+    """
+    Returns the cache key of a client's plot: client_id, data version and reducer version.
+    """
+    return PlotCache.make_key(
+        client_id,
+        get_client_data_version(engine, client_id),
+        get_reducer_version(),
+    )
+
+
+def _get_cached_plot(engine, client_id: str):
+    # Returns (key, html), rendering the plot only when it is not cached yet
+    key = get_client_plot_key(engine, client_id)
+    html = plot_cache.get_or_create(
+        key,
+        lambda: pio.to_html(
+            build_client_embedding_figure(engine, client_id), full_html=True
+        ),
+    )
+    return key, html
+
+
+def get_client_embedding_plot_html(client_id: str) -> str:
+    """
+    Returns the HTML of a client's embedding plot, from the plot cache when the client's
+    notes and the reducer are unchanged, otherwise freshly rendered and cached.
+
+    Args:
+        client_id (str): The ID of the client.
 
-    # Load the pre-trained UMAP model for dimensionality reduction
-    reducer = joblib.load(umap_model_path)
+    Returns:
+        str: The plot as a standalone HTML document.
+    """
+    _, html = _get_cached_plot(Database().get_engine(), client_id)
+    return html
 
-    # Helper function to safely parse embeddings from strings
-    def safe_parse_embedding(x):
-        if isinstance(x, str):
-            return np.array(ast.literal_eval(x), dtype=np.float32)
-        return np.array(x, dtype=np.float32)
 
-    # The embeddings are parsed into NumPy arrays, then stacked into a 2D array. This format is required by the UMAP model to perform dimensionality reduction.
-    df["embedding"] = df["embedding"].apply(safe_parse_embedding)
-    embeddings = np.vstack(df["embedding"])
+def get_client_embedding_figure_json(
+    client_id: str, bucket_days: int = FRAME_BUCKET_DAYS
+) -> str:
+    """
+    Returns the compact embedding figure of a client as plotly JSON, for st.plotly_chart.
+    The JSON is cached like the HTML plot, per client, data version and reducer version.
 
-    # Reduce embeddings to 2D using the UMAP model
-    reduced_embeddings = reducer.transform(embeddings)
+    Args:
+        client_id (str): The ID of the client.
+        bucket_days (int): Days per animation frame.
 
-    # Create a DataFrame for plotting
-    df_plot = pd.DataFrame(reduced_embeddings, columns=["x", "y"])
-    df_plot["text"] = df["note"]  # Add note text for hover information
-    df_plot["datetime"] = pd.to_datetime(df["datetime"])  # Convert datetime column
-    df_plot["time_diff"] = (
-        df_plot["datetime"] - df_plot["datetime"].min()
-    ).dt.days  # Calculate time difference
-    df_plot["name"] = df["name"].iloc[0]  # Add client name
+    Returns:
+        str: The figure as JSON.
+    """
+    engine = Database().get_engine()
+    key = PlotCache.make_key(
+        get_client_plot_key(engine, client_id), "compact", bucket_days
+    )
+    return figure_cache.get_or_create(
+        key,
+        lambda: pio.to_json(
+            build_client_embedding_figure(
+                engine, client_id, compact=True, bucket_days=bucket_days
+            ),
+            validate=False,
+        ),
+    )
+
+
+def get_payload_sizes(engine, client_id: str, bucket_days: int = FRAME_BUCKET_DAYS):
+    """
+    Returns the payload sizes in bytes of a client's plot: the standalone HTML page
+    (as previously sent to the dashboard), its figure JSON, and the compact figure JSON.
+    """
+    standalone = build_client_embedding_figure(engine, client_id)
+    compact = build_client_embedding_figure(
+        engine, client_id, compact=True, bucket_days=bucket_days
+    )
+    return {
+        "html_bytes": len(pio.to_html(standalone, full_html=True).encode("utf-8")),
+        "figure_json_bytes": len(pio.to_json(standalone).encode("utf-8")),
+        "compact_json_bytes": len(pio.to_json(compact).encode("utf-8")),
+        "frames": len(standalone.frames),
+        "compact_frames": len(compact.frames),
+    }
 
-    # Generate the plot using the embedding visualizer
-    fig = plot_client_embeddings(df_plot, topic_map_path)
 
-    # Save the plot as an HTML file
-    pio.write_html(fig, file=client_plot_html_path, auto_open=False)
+def create_client_embedding_plot(client_id: str):
+    """
+    Prepares a 2D embedding plot for a specific client based on their notes and embeddings.
+
+    Args:
+        client_id (str): The ID of the client.
 
-    return client_plot_html_path
+    Returns:
+        Path: Path to the cached HTML file containing the plot (unique per client and version).
+    """
+    key, html = _get_cached_plot(Database().get_engine(), client_id)
+    path = plot_cache.path_for(key)
+    if not path.exists():
+        # Served from memory, but the file was evicted from disk in the meantime
+        path = plot_cache.put(key, html)
+    return path
 
 
 if __name__ == "__main__":
@@ -83,3 +185,5 @@ if __name__ == "__main__":
     client_id = "mag003"
     html_file = create_client_embedding_plot(client_id)
     print(f"Plot saved to: {html_file}")
+    print(f"Plot cache: {plot_cache.stats()}")
+    print(f"Payload sizes: {get_payload_sizes(Database().get_engine(), client_id)}")
@@ -0,0 +1,258 @@
+"""
+This module maintains precomputed 2D UMAP coordinates for the notes in a side table:
+
+    note_projections(record_id, x, y, reducer_version, text_hash)
+
+reducer_version identifies the UMAP model file that produced a point, and text_hash is the
+content hash of the embedding it was projected from (see 02_upsert_embeddings.py). A point is
+stale when either differs, e.g. after the reducer is refitted or a note is re-embedded.
+project_pending() projects all missing and stale points in batches; the plot service then
+reads x/y with a narrow query instead of loading embeddings and running UMAP per request.
+The NOTE_PROJECTOR setting selects the model that projects new notes: the UMAP model itself or
+a faster approximation fitted on it (see projectors); switching it re-projects all notes.
+"""
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from backend.config.settings import get_settings
+from backend.database.vector_types import fetch_embedding_matrix
+from backend.services.projectors import get_projector_path
+from backend.services.reducer_cache import get_reducer_cache
+from sqlalchemy import text
+
+root = Path(__file__).resolve().parents[2]
+umap_model_path = root / "backend" / "models" / "notes_umap_2d.pkl"
+
+PROJECTION_TABLE = "note_projections"
+# The embedding column the UMAP model was fitted on
+PROJECTION_EMBEDDING_COLUMN = "nfi_embedding"
+
+_version_cache = {}
+_version_lock = threading.Lock()
+_tables_ready = set()
+
+
+def ensure_projection_table(engine) -> None:
+    """
+    Create the note_projections table if it does not exist (once per database), and the
+    content hash column of the embedding, which databases embedded before the hash
+    tracking of 02_upsert_embeddings.py do not have yet.
+    """
+    if str(engine.url) in _tables_ready:
+        return
+    with engine.begin() as conn:
+        # Look the column up first: ALTER TABLE locks records even when it is a no-op
+        has_hash_column = conn.execute(
+            text(
+                """SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'records'
+                AND column_name = :column"""
+            ),
+            {"column": f"{PROJECTION_EMBEDDING_COLUMN}_hash"},
+        ).first()
+        if not has_hash_column:
+            conn.execute(
+                text(
+                    f"ALTER TABLE records ADD COLUMN IF NOT EXISTS "
+                    f"{PROJECTION_EMBEDDING_COLUMN}_hash text"
+                )
+            )
+        conn.execute(
+            text(
+                f"""CREATE TABLE IF NOT EXISTS {PROJECTION_TABLE} (
+                record_id integer PRIMARY KEY REFERENCES records(id) ON DELETE CASCADE,
+                x real NOT NULL,
+                y real NOT NULL,
+                reducer_version text NOT NULL,
+                text_hash text
+            )"""
+            )
+        )
+    _tables_ready.add(str(engine.url))
+
+
+def get_active_model_path() -> Path:
+    """Return the model file of the projector selected by the NOTE_PROJECTOR setting."""
+    return get_projector_path(get_settings().note_projector, umap_model_path)
+
+
+def get_reducer_version(model_path: Optional[Path] = None) -> str:
+    """
+    Return a short content hash of the reducer file (default: the active projector).
+    The hash is cached per file modification time, so it is only recomputed when the
+    file changes.
+    """
+    model_path = model_path or get_active_model_path()
+    stat = model_path.stat()
+    key = (str(model_path), stat.st_mtime_ns, stat.st_size)
+    with _version_lock:
+        if key not in _version_cache:
+            with open(model_path, "rb") as f:
+                _version_cache[key] = hashlib.sha256(f.read()).hexdigest()[:12]
+        return _version_cache[key]
+
+
+def load_reducer(model_path: Optional[Path] = None):
+    """
+    Return the reducer (default: the active projector), loaded once per process
+    (see reducer_cache).
+    """
+    return get_reducer_cache(model_path or get_active_model_path()).get()
+
+
+def _pending_query(client_id: Optional[str]) -> str:
+    # Notes with an embedding but without a current projection, in id order
+    client_filter = "AND r.client_id = :client_id" if client_id else ""
+    return f"""SELECT r.id, r.{PROJECTION_EMBEDDING_COLUMN}_hash AS text_hash,
+        vector_send(r.{PROJECTION_EMBEDDING_COLUMN}) AS embedding
+    FROM records r
+    LEFT JOIN {PROJECTION_TABLE} p ON p.record_id = r.id
+    WHERE r.{PROJECTION_EMBEDDING_COLUMN} IS NOT NULL AND r.id > :last_id {client_filter}
+    AND (p.record_id IS NULL OR p.reducer_version <> :reducer_version
+         OR p.text_hash IS DISTINCT FROM r.{PROJECTION_EMBEDDING_COLUMN}_hash)
+    ORDER BY r.id
+    LIMIT :batch_size"""
+
+
+def save_projections(
+    conn, record_ids, coordinates: np.ndarray, reducer_version: str, text_hashes
+) -> None:
+    """Upsert a batch of projected points in one statement."""
+    conn.execute(
+        text(
+            f"""INSERT INTO {PROJECTION_TABLE} (record_id, x, y, reducer_version, text_hash)
+            SELECT p.record_id, p.x, p.y, :reducer_version, p.text_hash
+            FROM unnest(CAST(:record_ids AS integer[]), CAST(:xs AS real[]),
+                        CAST(:ys AS real[]), CAST(:text_hashes AS text[]))
+                AS p(record_id, x, y, text_hash)
+            ON CONFLICT (record_id) DO UPDATE SET x = EXCLUDED.x, y = EXCLUDED.y,
+                reducer_version = EXCLUDED.reducer_version, text_hash = EXCLUDED.text_hash"""
+        ),
+        {
+            "record_ids": [int(i) for i in record_ids],
+            "xs": coordinates[:, 0].astype(float).tolist(),
+            "ys": coordinates[:, 1].astype(float).tolist(),
+            "text_hashes": [None if pd.isna(h) else h for h in text_hashes],
+            "reducer_version": reducer_version,
+        },
+    )
+
+
+def project_pending(
+    engine,
+    reducer=None,
+    client_id: Optional[str] = None,
+    batch_size: int = 5000,
+    model_path: Optional[Path] = None,
+) -> int:
+    """
+    Project all notes without a current projection, optionally for one client only.
+    The reducer is loaded from model_path (default: the active projector) when not given,
+    and only if there is work to do.
+
+    Returns:
+        int: Number of notes projected.
+    """
+    ensure_projection_table(engine)
+    model_path = model_path or get_active_model_path()
+    reducer_version = get_reducer_version(model_path)
+    query = _pending_query(client_id)
+    params = {
+        "reducer_version": reducer_version,
+        "batch_size": batch_size,
+        "client_id": client_id,
+    }
+
+    projected = 0
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            df, embeddings = fetch_embedding_matrix(
+                conn, query, {**params, "last_id": last_id}
+            )
+        if df.empty:
+            break
+        if reducer is None:
+            reducer = load_reducer(model_path)
+        coordinates = reducer.transform(embeddings)
+        with engine.begin() as conn:
+            save_projections(
+                conn, df["id"], coordinates, reducer_version, df["text_hash"]
+            )
+        projected += len(df)
+        last_id = int(df["id"].iloc[-1])
+    return projected
+
+
+def update_projections_if_available(engine, embedding_column: str) -> int:
+    """
+    Incremental hook for the embedding pipeline: project new and changed notes after
+    embedding_column was updated, if it is the column the reducer was fitted on.
+    """
+    if (
+        embedding_column != PROJECTION_EMBEDDING_COLUMN
+        or not get_active_model_path().exists()
+    ):
+        return 0
+    start = time.perf_counter()
+    projected = project_pending(engine)
+    print(f"Projected {projected} notes to 2D in {time.perf_counter() - start:.1f}s")
+    return projected
+
+
+def get_client_data_version(engine, client_id: str) -> str:
+    """
+    Return a cheap fingerprint of a client's plotted notes: their count, highest id and a
+    hash over id, datetime and content hash. It changes when a note is added, removed,
+    edited or re-embedded.
+    """
+    ensure_projection_table(engine)
+    query = f"""SELECT COUNT(*) AS n, MAX(r.id) AS max_id,
+        md5(string_agg(r.id || ':' || r.datetime || ':' ||
+            COALESCE(r.{PROJECTION_EMBEDDING_COLUMN}_hash, ''), ',' ORDER BY r.id)) AS digest
+    FROM records r
+    WHERE r.client_id = :client_id"""
+    with engine.connect() as conn:
+        row = conn.execute(text(query), {"client_id": client_id}).one()
+    return f"{row.n}:{row.max_id}:{row.digest}"
+
+
+def get_client_projections(engine, client_id: str) -> pd.DataFrame:
+    """
+    Fetch the projected notes of a client, projecting any missing or stale ones first.
+
+    Returns:
+        pd.DataFrame: Columns id, note, datetime, name, x and y, ordered by datetime.
+    """
+    if get_active_model_path().exists():
+        project_pending(engine, client_id=client_id)
+
+    query = f"""SELECT r.id, r.note, r.datetime, c.name, p.x, p.y
+FROM records r
+JOIN {PROJECTION_TABLE} p ON p.record_id = r.id
+LEFT JOIN clients c ON r.client_id = c.client_id
+WHERE r.client_id = :client_id AND p.reducer_version = :reducer_version
+ORDER BY r.datetime;
+"""
+    with engine.connect() as conn:
+        return pd.read_sql(
+            text(query),
+            conn,
+            params={
+                "client_id": client_id,
+                "reducer_version": get_reducer_version(),
+            },
+        )
+
+
+if __name__ == "__main__":
+    # Example usage: project all pending notes
+    from backend.database.db_connection import Database
+
+    print(f"Projected {project_pending(Database().get_engine())} notes")
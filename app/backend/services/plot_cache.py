@@ -0,0 +1,160 @@
+"""
+Content-addressed cache for rendered client plots.
+
+A plot is keyed by client_id, a data version of the client's notes and the reducer version,
+so a cached plot is reused exactly as long as none of them changed. Plots are kept in an
+in-memory LRU and as files on disk (shared between processes). Files are written atomically
+(temporary file + os.replace) and the folder is kept under a size limit by evicting the
+least recently used files. Concurrent requests for the same key render the plot only once.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+
+class PlotCache:
+    """
+    Two-level (memory + disk) LRU cache of rendered plots.
+    """
+
+    def __init__(
+        self,
+        folder: Union[str, Path],
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        suffix: str = ".html",
+    ) -> None:
+        self.folder = Path(folder)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # Per-key render locks with the number of callers holding or waiting for them
+        self._key_locks: Dict[str, list] = {}
+
+    @staticmethod
+    def make_key(client_id: str, *versions) -> str:
+        """Build a file-safe cache key from a client id and version parts."""
+        digest = hashlib.sha256(
+            "|".join(str(v) for v in (client_id, *versions)).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{re.sub(r'[^A-Za-z0-9_-]', '_', str(client_id))}_{digest}"
+
+    def path_for(self, key: str) -> Path:
+        """Return the disk location of a key."""
+        return self.folder / f"{key}{self.suffix}"
+
+    def _remember(self, key: str, content: str) -> None:
+        # Add to the in-memory LRU; caller holds the lock
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = content
+        self._memory_bytes += len(content)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached plot from memory or disk, or None."""
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+
+        path = self.path_for(key)
+        try:
+            content = path.read_text(encoding="utf-8")
+            # Mark the file as recently used for disk eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._remember(key, content)
+        return content
+
+    def put(self, key: str, content: str) -> Path:
+        """Store a plot in memory and atomically on disk; returns its path."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._remember(key, content)
+        self._evict_disk()
+        return path
+
+    def _evict_disk(self) -> None:
+        # Delete the least recently used files until the folder fits in max_disk_bytes
+        files = []
+        for path in self.folder.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def get_or_create(self, key: str, create: Callable[[], str]) -> str:
+        """
+        Return the cached plot for key, rendering it with create() on a miss.
+        Concurrent callers with the same key wait for a single render.
+        """
+        content = self.get(key)
+        if content is not None:
+            with self._lock:
+                self.hits += 1
+            return content
+
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                content = self.get(key)
+                if content is None:
+                    content = create()
+                    self.put(key, content)
+                    with self._lock:
+                        self.misses += 1
+                else:
+                    with self._lock:
+                        self.hits += 1
+        finally:
+            # Drop the lock only when no other caller still waits for it
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+        return content
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the in-memory size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
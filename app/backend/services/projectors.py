@@ -0,0 +1,134 @@
+"""
+Fast out-of-sample projectors as an alternative to UMAP.transform for the note plot.
+
+UMAP.transform runs a nearest-neighbour search plus optimisation epochs per call (numba-compiled),
+which is slow and not fully deterministic between calls. The projectors here are fitted on the
+UMAP training data and its 2D embedding (see scripts/reduce_embeddings/fit_reducer.py) and place
+new points with plain NumPy:
+
+- KNNProjector: inverse-distance weighted average of the 2D coordinates of the k nearest
+  training points.
+- LinearProjector: a ridge-regression map from embedding to 2D coordinates.
+
+Both have the transform() interface of the UMAP model, so note_projections uses either one in
+its place. They are stored next to the UMAP model as <model>_<kind>.pkl and loaded through the
+reducer cache (memory-mapped training arrays). The NOTE_PROJECTOR setting selects the one used.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable
+
+import numpy as np
+
+PROJECTOR_KINDS = ("umap", "knn", "linear")
+
+
+class KNNProjector:
+    """
+    Places points at the inverse-distance weighted mean of the 2D coordinates of their k
+    nearest training points (euclidean, like the UMAP default metric).
+    """
+
+    def __init__(self, n_neighbors: int = 10, chunk_size: int = 256):
+        self.n_neighbors = n_neighbors
+        self.chunk_size = chunk_size
+
+    def fit(self, embeddings: np.ndarray, coordinates: np.ndarray) -> "KNNProjector":
+        self.train_embeddings_ = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.train_sq_norms_ = np.einsum(
+            "ij,ij->i", self.train_embeddings_, self.train_embeddings_
+        )
+        self.train_coordinates_ = np.asarray(coordinates, dtype=np.float32)
+        return self
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        k = min(self.n_neighbors, len(self.train_embeddings_))
+        result = np.empty((len(embeddings), 2), dtype=np.float32)
+        # Chunks bound the (chunk x training rows) distance matrix
+        for start in range(0, len(embeddings), self.chunk_size):
+            chunk = embeddings[start : start + self.chunk_size]
+            sq_dist = (
+                np.einsum("ij,ij->i", chunk, chunk)[:, None]
+                + self.train_sq_norms_[None, :]
+                - 2.0 * chunk @ self.train_embeddings_.T
+            )
+            neighbors = np.argpartition(sq_dist, k - 1, axis=1)[:, :k]
+            dist = np.sqrt(
+                np.maximum(np.take_along_axis(sq_dist, neighbors, axis=1), 0.0)
+            )
+            weights = 1.0 / (dist + 1e-6)
+            weights /= weights.sum(axis=1, keepdims=True)
+            result[start : start + len(chunk)] = np.einsum(
+                "ij,ijk->ik", weights, self.train_coordinates_[neighbors]
+            )
+        return result
+
+
+class LinearProjector:
+    """
+    Ridge regression from embedding to 2D coordinates, with an intercept.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+
+    def fit(self, embeddings: np.ndarray, coordinates: np.ndarray) -> "LinearProjector":
+        x = np.asarray(embeddings, dtype=np.float64)
+        y = np.asarray(coordinates, dtype=np.float64)
+        x_mean, y_mean = x.mean(axis=0), y.mean(axis=0)
+        xc = x - x_mean
+        gram = xc.T @ xc + self.alpha * np.eye(x.shape[1])
+        self.coef_ = np.linalg.solve(gram, xc.T @ (y - y_mean)).astype(np.float32)
+        self.intercept_ = (y_mean - x_mean @ self.coef_).astype(np.float32)
+        return self
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        return np.asarray(embeddings, dtype=np.float32) @ self.coef_ + self.intercept_
+
+
+PROJECTORS = {"knn": KNNProjector, "linear": LinearProjector}
+
+
+def get_projector_path(kind: str, umap_path: Path) -> Path:
+    """
+    Return the model file of a projector kind: the UMAP model itself for 'umap',
+    otherwise <umap model>_<kind>.pkl next to it.
+    """
+    if kind not in PROJECTOR_KINDS:
+        raise ValueError(
+            f"Unknown projector: {kind}. Choose from {', '.join(PROJECTOR_KINDS)}"
+        )
+    if kind == "umap":
+        return umap_path
+    return umap_path.with_name(f"{umap_path.stem}_{kind}{umap_path.suffix}")
+
+
+def fit_projectors(
+    embeddings: np.ndarray,
+    coordinates: np.ndarray,
+    umap_path: Path,
+    kinds: Iterable[str] = ("knn", "linear"),
+) -> Dict[str, Path]:
+    """
+    Fit projectors on the UMAP training embeddings and their 2D coordinates and save them
+    next to the UMAP model (uncompressed, so the reducer cache can memory-map them).
+
+    Returns:
+        dict: Path of the saved model per projector kind.
+    """
+    import joblib
+
+    paths = {}
+    for kind in kinds:
+        projector = PROJECTORS[kind]().fit(embeddings, coordinates)
+        paths[kind] = get_projector_path(kind, umap_path)
+        joblib.dump(projector, paths[kind])
+    return paths
+
+
+def fit_projectors_from_reducer(
+    reducer, umap_path: Path, kinds: Iterable[str] = ("knn", "linear")
+) -> Dict[str, Path]:
+    """Fit projectors on the training data stored in a fitted UMAP model."""
+    return fit_projectors(reducer._raw_data, reducer.embedding_, umap_path, kinds)
@@ -0,0 +1,131 @@
+"""
+Process-wide cache for fitted reducer models (the UMAP model behind the embedding plot).
+
+A model file is loaded once per process and shared between callers. Large NumPy arrays in
+the pickle (UMAP's training data and embedding) are memory-mapped with joblib's mmap_mode,
+so they are paged in from the file on demand and shared between processes instead of
+copied onto the heap. The cache reloads a model when its file changes (mtime or size), and
+warmup() runs one transform so numba's JIT compilation is paid at startup rather than on
+the first plot. stats() reports load/warmup time and memory per model.
+"""
+
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from backend.llm.model_registry import get_rss_bytes
+
+
+def _array_bytes(model: Any) -> Dict[str, int]:
+    # Bytes held in memory-mapped vs. heap NumPy arrays among the model's attributes
+    totals = {"mapped_bytes": 0, "heap_bytes": 0}
+    for value in getattr(model, "__dict__", {}).values():
+        if isinstance(value, np.memmap):
+            totals["mapped_bytes"] += value.nbytes
+        elif isinstance(value, np.ndarray):
+            totals["heap_bytes"] += value.nbytes
+    return totals
+
+
+class ReducerCache:
+    """
+    Loads a joblib-pickled model once and reloads it when the file changes.
+    """
+
+    def __init__(self, path: Union[str, Path], mmap_mode: Optional[str] = "r"):
+        self.path = Path(path)
+        self.mmap_mode = mmap_mode
+        self._model = None
+        self._file_key = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"loads": 0}
+
+    def _current_file_key(self):
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        import joblib
+
+        rss_before = get_rss_bytes()
+        start = time.perf_counter()
+        # joblib ignores mmap_mode for compressed pickles, with a UserWarning
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            model = joblib.load(self.path, mmap_mode=self.mmap_mode)
+        mmap_mode = self.mmap_mode
+        for warning in caught:
+            if "not compatible with compressed file" in str(warning.message):
+                mmap_mode = None
+            else:
+                warnings.warn_explicit(
+                    warning.message, warning.category, warning.filename, warning.lineno
+                )
+        load_seconds = time.perf_counter() - start
+        rss_after = get_rss_bytes()
+
+        self._stats.update(
+            {
+                "loads": self._stats["loads"] + 1,
+                "load_seconds": load_seconds,
+                "warmup_seconds": None,
+                "mmap_mode": mmap_mode,
+                "rss_delta_bytes": (
+                    rss_after - rss_before
+                    if rss_before is not None and rss_after is not None
+                    else None
+                ),
+                **_array_bytes(model),
+            }
+        )
+        return model
+
+    def get(self):
+        """
+        Return the cached model, loading it on first use or when the file has changed.
+        """
+        file_key = self._current_file_key()
+        with self._lock:
+            if self._model is None or file_key != self._file_key:
+                self._model = self._load()
+                self._file_key = file_key
+            return self._model
+
+    def warmup(self) -> None:
+        """
+        Load the model and run one transform, so JIT compilation happens now.
+        """
+        model = self.get()
+        raw_data = getattr(model, "_raw_data", None)
+        if raw_data is None or not hasattr(model, "transform"):
+            return
+        start = time.perf_counter()
+        model.transform(np.asarray(raw_data[:1], dtype=np.float32))
+        with self._lock:
+            self._stats["warmup_seconds"] = time.perf_counter() - start
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return load statistics: number of loads, load and warmup seconds, RSS growth during
+        the load, and bytes held in memory-mapped and heap arrays.
+        """
+        with self._lock:
+            return {"path": str(self.path), **self._stats}
+
+
+_caches: Dict[Path, ReducerCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_reducer_cache(path: Union[str, Path]) -> ReducerCache:
+    """
+    Return the process-wide cache for a model file.
+    """
+    path = Path(path).resolve()
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ReducerCache(path)
+        return _caches[path]
@@ -1,9 +1,16 @@
 import datetime as dt
+import threading
 
+import pandas as pd
+import plotly.io as pio
 import streamlit as st
-import streamlit.components.v1 as components
+from backend.database.async_queries import AsyncGardeniaClient, run_coroutine
 from backend.database.gardenia_queries import GardeniaClient, GardeniaClients
-from backend.services.generate_client_embedding_plot import create_client_embedding_plot
+from backend.services.generate_client_embedding_plot import (
+    get_client_embedding_figure_json,
+)
+from backend.services.note_projections import get_active_model_path
+from backend.services.reducer_cache import get_reducer_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,17 +25,19 @@ def main():
         initial_sidebar_state="auto",
     )
     st.title("🌷 Gardenia Dashboard 🌷")
+    warm_up_reducer()
 
     # Display a loading spinner while fetching data
     with st.spinner("Loading data..."):
-        clients_df = GardeniaClients().clients
+        clients = get_client_directory()
         st.markdown(
             "[Bekijk de Gardenia-collectie op Hugging Face](https://huggingface.co/collections/ekrombouts/gardenia-66fd983fd8ef894b11f418a1)"
         )
 
     # Allow the user to select a ward and client
-    selected_ward, client_id = select_client(clients_df)
-    gardenia_client = GardeniaClient(client_id)
+    selected_ward, client_id = select_client(clients)
+    gardenia_client = clients.get_client(client_id) or GardeniaClient(client_id)
+    client_data = load_client_data(client_id, gardenia_client.client_details)
 
     tab1, tab2, tab3, tab4, tab5 = st.tabs(
         [
@@ -45,10 +54,10 @@ def main():
         display_client_profile(gardenia_client)
 
     with tab2:
-        display_scenarios(gardenia_client)
+        display_scenarios(client_data["scenarios"])
 
     with tab3:
-        display_reports(gardenia_client)
+        display_reports(gardenia_client, client_data["note_stats"])
 
     with tab4:
         # Display the client embedding plot
@@ -71,25 +80,49 @@ https://github.com/ekrombouts/GardeniaApp
         )
 
 
-def select_client(clients_df):
+@st.cache_resource
+def warm_up_reducer():
+    # Once per process: load the projector (NOTE_PROJECTOR) and, for UMAP, compile its
+    # transform in the background, so the first embedding plot does not pay for it
+    model_path = get_active_model_path()
+    cache = get_reducer_cache(model_path)
+    if model_path.exists():
+        threading.Thread(target=cache.warmup, daemon=True).start()
+    return cache
+
+
+@st.cache_resource
+def get_client_directory():
+    # Shared across sessions and reruns; the directory refreshes itself after its TTL
+    return GardeniaClients()
+
+
+def select_client(clients):
     # Allow the user to select a ward and client from dropdowns
     col1, col2 = st.columns(2)
     with col1:
         selected_ward = st.selectbox(
             "Selecteer een afdeling:",  # Select a ward
-            options=clients_df["ward"].unique(),
+            options=clients.get_wards(),
         )
     with col2:
         client_id = st.selectbox(
             "Selecteer een cliënt:",  # Select a client
-            options=clients_df[clients_df["ward"] == selected_ward]["client_id"],
-            format_func=lambda x: clients_df[clients_df["client_id"] == x][
-                "name"
-            ].values[0],
+            options=clients.get_client_ids(selected_ward),
+            format_func=clients.get_client_name,
         )
     return selected_ward, client_id
 
 
+@st.cache_data(ttl=300, show_spinner="Loading client data...")
+def load_client_data(client_id, _client_details=None):
+    # Fetch scenarios and note statistics concurrently, once per client and TTL instead of
+    # on every rerun; the reports tab pages through the notes itself
+    return run_coroutine(
+        AsyncGardeniaClient(client_id, _client_details).load(include_notes=False)
+    )
+
+
 def display_client_profile(gardenia_client):
     # Display the profile of the selected client
     st.subheader(f"🪪 Profiel van {gardenia_client.name}")
@@ -108,10 +141,9 @@ def display_client_profile(gardenia_client):
     )
 
 
-def display_scenarios(gardenia_client):
+def display_scenarios(client_scenarios):
     # Display scenarios for the selected client
     st.subheader("🎬 Scenario")
-    client_scenarios = gardenia_client.get_scenario()
     if not client_scenarios.empty:
         st.table(
             client_scenarios[["week", "scenario"]]
@@ -122,26 +154,65 @@ def display_scenarios(gardenia_client):
         st.warning("Geen scenario's gevonden voor deze cliënt.")  # No scenarios found
 
 
-def display_reports(gardenia_client):
+# Number of notes shown per page in the reports tab
+NOTES_PAGE_SIZE = 50
+
+
+def display_reports(gardenia_client, note_stats):
     # Display reports for the selected client
-    client_records = gardenia_client.get_notes()
+    # The date bounds come from the note statistics; the notes are paged from the database
+    first_note, last_note = note_stats["first_note"], note_stats["last_note"]
+    first_date = pd.Timestamp(first_note).date() if pd.notna(first_note) else None
+    last_date = pd.Timestamp(last_note).date() if pd.notna(last_note) else None
     st.subheader("📋 Rapportages")
-    selected_start_date, selected_end_date = select_date_range(client_records)
+    st.caption(f"{note_stats['note_count']} rapportages")  # Number of reports
+    selected_start_date, selected_end_date = select_date_range(first_date, last_date)
+    if selected_start_date and selected_end_date:
+        # A newly selected range starts at the first page
+        st.session_state["notes_client_id"] = gardenia_client.client_id
+        st.session_state["notes_cursors"] = [None]
+    elif st.session_state.get("notes_client_id") == gardenia_client.client_id:
+        # Keep showing the last selected range while paging
+        selected_start_date = st.session_state.get("selected_start_date")
+        selected_end_date = st.session_state.get("selected_end_date")
+
     if selected_start_date and selected_end_date:
         st.markdown("#### Rapportages")
-        client_notes = gardenia_client.get_notes(
-            start_date=selected_start_date, end_date=selected_end_date
-        )
-        if not client_notes.empty:
-            for _, row in client_notes.iterrows():
-                st.markdown(f"- **{row['datetime']}**: {row['note']}")
-        else:
-            st.info(
-                "Geen rapportages gevonden voor de opgegeven periode."
-            )  # No reports found
+        display_notes_page(gardenia_client, selected_start_date, selected_end_date)
+
+
+def display_notes_page(gardenia_client, start_date, end_date):
+    # Display one page of notes; the stack of keyset cursors allows paging back
+    cursors = st.session_state.setdefault("notes_cursors", [None])
+    client_notes = gardenia_client.get_notes_page(
+        after=cursors[-1],
+        limit=NOTES_PAGE_SIZE,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    if client_notes.empty and len(cursors) == 1:
+        st.info(
+            "Geen rapportages gevonden voor de opgegeven periode."
+        )  # No reports found
+        return
+
+    for _, row in client_notes.iterrows():
+        st.markdown(f"- **{row['datetime']}**: {row['note']}")
 
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(cursors) > 1 and st.button("Vorige pagina"):  # Previous page
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if len(client_notes) == NOTES_PAGE_SIZE and st.button(
+            "Volgende pagina"  # Next page
+        ):
+            cursors.append(gardenia_client.page_cursor(client_notes))
+            st.rerun()
 
-def select_date_range(client_records):
+
+def select_date_range(first_date, last_date):
     # Allow the user to select a date range for reports
     selected_start_date = None
     selected_end_date = None
@@ -152,19 +223,11 @@ def select_date_range(client_records):
         st.markdown("##### Van/Tot")  # From/To
         start_date = st.date_input(
             "Startdatum:",  # Start date
-            value=(
-                client_records["datetime"].min().date()
-                if not client_records.empty
-                else None
-            ),
+            value=first_date,
         )
         end_date = st.date_input(
             "Einddatum:",  # End date
-            value=(
-                client_records["datetime"].max().date()
-                if not client_records.empty
-                else None
-            ),
+            value=last_date,
         )
         if st.button("Toon Rapportages", key="manual_range"):  # Show reports
             selected_start_date = start_date
@@ -180,26 +243,16 @@ def select_date_range(client_records):
             help="Kies een weeknummer van het verblijf.",  # Choose a week number
         )
         if st.button("Toon week", key="select_week"):  # Show week
-            min_date = (
-                client_records["datetime"].min().date()
-                if not client_records.empty
-                else None
-            )
-            if min_date:
-                selected_start_date = min_date + dt.timedelta(weeks=selected_week - 1)
+            if first_date:
+                selected_start_date = first_date + dt.timedelta(weeks=selected_week - 1)
                 selected_end_date = selected_start_date + dt.timedelta(weeks=1)
 
     with col3:
         st.markdown("##### Eerste 6 weken")  # First 6 weeks
         if st.button("Toon weken", key="first_six_weeks"):  # Show weeks
-            min_date = (
-                client_records["datetime"].min().date()
-                if not client_records.empty
-                else None
-            )
-            if min_date:
-                selected_start_date = min_date
-                selected_end_date = min_date + dt.timedelta(weeks=6)
+            if first_date:
+                selected_start_date = first_date
+                selected_end_date = first_date + dt.timedelta(weeks=6)
 
     if selected_start_date and selected_end_date:
         st.session_state["selected_start_date"] = selected_start_date
@@ -212,13 +265,11 @@ def display_client_embedding_plot(client_id):
     st.subheader("📊 Embedding Plot")
     if st.button("Toon Embedding Plot"):
         with st.spinner("Genereren van de embedding plot..."):
-            html_path = create_client_embedding_plot(client_id)
-
-            # **Laad en toon HTML in Streamlit**
-            with open(html_path, "r", encoding="utf-8") as f:
-                html_content = f.read()
+            # Uit de plot-cache zolang de notities en het UMAP-model ongewijzigd zijn;
+            # compacte figuur-JSON, de achtergrond komt als statisch bestand
+            figure_json = get_client_embedding_figure_json(client_id)
 
-            components.html(html_content, height=600, width=700, scrolling=True)
+            st.plotly_chart(pio.from_json(figure_json), use_container_width=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,334 @@
+"""
+This script benchmarks the embedding path end to end with a deterministic fake provider, so
+results depend on the code and the database, not on a model or an API.
+
+For each dataset size it fills a scratch table (bench_records) with synthetic notes and measures:
+- embedding throughput of EmbeddingFactory (texts/sec)
+- database write throughput of update_embeddings per writer (rows/sec)
+- get_nearest_neighbors latency (p50/p95/p99 in ms)
+- peak Python memory per stage (tracemalloc)
+
+The fake provider returns seeded random unit vectors per text and can add latency per request
+and per text to mimic a real model or API. Results are written as JSON to output/benchmarks,
+and --compare prints the change against an earlier results file.
+
+Requires a local Postgres with pgvector, configured like the app (DB_* environment variables);
+--no-db measures embedding throughput only.
+
+Usage (with PYTHONPATH=app):
+    python scripts/benchmarks/bench_embedding_pipeline.py --sizes 1000 10000
+    python scripts/benchmarks/bench_embedding_pipeline.py --writers row copy --batch-size 100
+    python scripts/benchmarks/bench_embedding_pipeline.py --latency-per-text 0.001 --no-db
+    python scripts/benchmarks/bench_embedding_pipeline.py --compare output/benchmarks/<earlier>.json
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+from backend.llm.embedding_factory import (
+    EmbeddingFactory,
+    EmbeddingProvider,
+    register_provider,
+)
+from bench_utils import percentile
+from pydantic import BaseModel
+from sqlalchemy import text
+
+root = Path(__file__).resolve().parents[2]
+results_folder = root / "output" / "benchmarks"
+sys.path.insert(0, str(root / "scripts" / "populate_db"))
+
+BENCH_TABLE = "bench_records"
+WORDS = (
+    "mevrouw meneer slaapt goed onrustig eet drinkt weinig veel pijn wond verzorging "
+    "mobiliteit rolstoel valt familie bezoek medicatie dagbesteding verward vrolijk "
+    "douchen toilet nacht ochtend middag avond arts fysiotherapie gewicht temperatuur"
+).split()
+
+
+class FakeEmbeddingSettings(BaseModel):
+    """Settings for the fake embedding provider."""
+
+    embedding_model: str = "fake-embedding"
+    embedding_dimension: int = 768
+    embedding_column: str = "fake_embedding"
+    latency_per_request: float = 0.0  # seconds per create_embeddings call
+    latency_per_text: float = 0.0  # additional seconds per text
+
+
+class FakeEmbedder(EmbeddingProvider):
+    """Deterministic provider: a seeded random unit vector per text, with optional latency."""
+
+    def __init__(self, settings: FakeEmbeddingSettings):
+        self.settings = settings
+        self.client = self._initialize_client()
+
+    def _initialize_client(self):
+        return None
+
+    def create_embeddings(self, texts: List[str], **kwargs) -> List[List[float]]:
+        delay = (
+            self.settings.latency_per_request
+            + self.settings.latency_per_text * len(texts)
+        )
+        if delay:
+            time.sleep(delay)
+        vectors = np.empty((len(texts), self.settings.embedding_dimension), np.float32)
+        for i, t in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha256(t.encode("utf-8")).digest()[:8], "big")
+            vectors[i] = np.random.default_rng(seed).standard_normal(vectors.shape[1])
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.tolist()
+
+    def get_dimension(self) -> int:
+        return self.settings.embedding_dimension
+
+    def get_embedding_column_name(self) -> str:
+        return self.settings.embedding_column
+
+
+register_provider("fake", FakeEmbedder)
+
+
+def make_notes(n: int, seed: int = 42) -> List[str]:
+    """Generate n synthetic notes of varying length."""
+    rng = random.Random(seed)
+    return [
+        f"Rapportage {i}: " + " ".join(rng.choices(WORDS, k=rng.randint(5, 60)))
+        for i in range(n)
+    ]
+
+
+def measure(fn):
+    """Run fn and return (result, seconds, peak traced memory in bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def bench_embedding(factory: EmbeddingFactory, notes: List[str], batch_size: int):
+    """Embed all notes in batches; returns throughput and peak memory."""
+
+    def run():
+        for i in range(0, len(notes), batch_size):
+            factory.create_embeddings(notes[i : i + batch_size])
+
+    _, seconds, peak = measure(run)
+    return {
+        "texts": len(notes),
+        "seconds": seconds,
+        "texts_per_sec": len(notes) / seconds if seconds else 0.0,
+        "peak_memory_bytes": peak,
+    }
+
+
+def create_bench_table(engine, notes: List[str]):
+    """(Re)create the scratch table with the given notes."""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        conn.execute(
+            text(f"CREATE TABLE {BENCH_TABLE} (id serial PRIMARY KEY, note text)")
+        )
+    pd.DataFrame({"note": notes}).to_sql(
+        BENCH_TABLE, engine, if_exists="append", index=False, chunksize=5000
+    )
+
+
+def bench_writes(engine, upsert, factory, writer: str, batch_size: int):
+    """Embed and write all rows with one writer; returns write throughput."""
+    column_name = factory.get_embedding_column_name()
+    hash_column, model_column = upsert.get_tracking_columns(column_name)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"UPDATE {BENCH_TABLE} SET {column_name} = NULL, {hash_column} = NULL, {model_column} = NULL"
+            )
+        )
+
+    (rows, write_seconds), seconds, peak = measure(
+        lambda: upsert.update_embeddings(
+            engine, BENCH_TABLE, factory, batch_size=batch_size, writer=writer
+        )
+    )
+    return {
+        "writer": writer,
+        "rows": rows,
+        "seconds": seconds,
+        "write_seconds": write_seconds,
+        "rows_per_sec": rows / write_seconds if write_seconds else 0.0,
+        "peak_memory_bytes": peak,
+    }
+
+
+def bench_queries(engine, factory, queries: List[str], limit: int):
+    """Run nearest-neighbour queries one by one; returns latency percentiles."""
+    from backend.database.vector_search import get_nearest_neighbors
+
+    latencies = []
+
+    def run():
+        for query in queries:
+            start = time.perf_counter()
+            get_nearest_neighbors(
+                query, BENCH_TABLE, "note", factory, engine, limit=limit
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    _, _, peak = measure(run)
+    return {
+        "queries": len(queries),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "peak_memory_bytes": peak,
+    }
+
+
+def git_commit() -> str:
+    """Return the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=root,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: Path):
+    """Print the relative change of each metric against an earlier results file."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {r["size"]: r for r in baseline["results"]}
+
+    def change(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nCompared to {baseline_path.name} ({baseline['meta']['commit']}):")
+    for result in results["results"]:
+        old = previous.get(result["size"])
+        if old is None:
+            continue
+        print(
+            f"  size {result['size']}: texts/sec "
+            f"{change(result['embedding']['texts_per_sec'], old['embedding']['texts_per_sec'])}"
+        )
+        old_writes = {w["writer"]: w for w in old.get("writes", [])}
+        for write in result.get("writes", []):
+            if write["writer"] in old_writes:
+                print(
+                    f"    {write['writer']} rows/sec "
+                    f"{change(write['rows_per_sec'], old_writes[write['writer']]['rows_per_sec'])}"
+                )
+        if result.get("queries") and old.get("queries"):
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                print(
+                    f"    query {key} {change(result['queries'][key], old['queries'][key])}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--writers", nargs="+", default=["row", "copy"])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--latency-per-request", type=float, default=0.0)
+    parser.add_argument("--latency-per-text", type=float, default=0.0)
+    parser.add_argument("--no-db", action="store_true", help="embedding stage only")
+    parser.add_argument("--compare", type=Path, help="earlier results file")
+    args = parser.parse_args()
+
+    settings = FakeEmbeddingSettings(
+        embedding_dimension=args.dimension,
+        latency_per_request=args.latency_per_request,
+        latency_per_text=args.latency_per_text,
+    )
+    factory = EmbeddingFactory(provider="fake", settings=settings)
+
+    engine = upsert = None
+    if not args.no_db:
+        from backend.database.db_connection import Database
+
+        engine = Database().get_engine()
+        upsert = importlib.import_module("02_upsert_embeddings")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: str(v) for k, v in vars(args).items()},
+        },
+        "results": [],
+    }
+
+    for size in args.sizes:
+        notes = make_notes(size)
+        result = {"size": size}
+        result["embedding"] = bench_embedding(factory, notes, args.batch_size)
+        print(
+            f"[{size}] embedding: {result['embedding']['texts_per_sec']:.0f} texts/sec"
+        )
+
+        if engine is not None:
+            create_bench_table(engine, notes)
+            upsert.prepare_embedding_columns(engine, BENCH_TABLE, factory)
+            result["writes"] = []
+            for writer in args.writers:
+                write = bench_writes(engine, upsert, factory, writer, args.batch_size)
+                result["writes"].append(write)
+                print(f"[{size}] {writer} writes: {write['rows_per_sec']:.0f} rows/sec")
+
+            queries = make_notes(args.queries, seed=7)
+            result["queries"] = bench_queries(engine, factory, queries, args.limit)
+            print(
+                f"[{size}] queries: p50 {result['queries']['p50_ms']:.2f} ms, "
+                f"p95 {result['queries']['p95_ms']:.2f} ms, p99 {result['queries']['p99_ms']:.2f} ms"
+            )
+        results["results"].append(result)
+
+    if engine is not None:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+
+    results_folder.mkdir(parents=True, exist_ok=True)
+    output_path = (
+        results_folder
+        / f"embedding_pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
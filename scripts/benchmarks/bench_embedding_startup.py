@@ -0,0 +1,120 @@
+"""
+This script measures the startup cost of the embedding layer: the time to import
+backend.llm.embedding_factory in a fresh interpreter, which heavy libraries that import pulls
+in, and per provider the time to construct an EmbeddingFactory and to create the first
+embedding. Providers whose dependencies or credentials are missing are reported and skipped.
+
+With --budget the script exits with status 1 when the import takes longer than the budget or
+loads one of the heavy libraries, so it can guard against import-time regressions in CI.
+
+Usage (with PYTHONPATH=app):
+    python scripts/benchmarks/bench_embedding_startup.py --runs 5
+    python scripts/benchmarks/bench_embedding_startup.py --providers sentence_transformer
+    python scripts/benchmarks/bench_embedding_startup.py --budget 1.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Libraries that should only be imported once a provider that needs them is constructed
+HEAVY_MODULES = ["openai", "sentence_transformers", "torch", "transformers"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.llm.embedding_factory
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (
+    HEAVY_MODULES,
+)
+
+
+def measure_import(runs: int) -> dict:
+    """Import the embedding factory in fresh interpreters; returns the best run."""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=os.environ.copy(),
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(results, key=lambda r: r["seconds"])
+    return {
+        "seconds": best["seconds"],
+        "runs": [r["seconds"] for r in results],
+        "loaded": best["loaded"],
+    }
+
+
+def measure_provider(provider: str) -> dict:
+    """Construct a provider and create a first embedding, timing both steps."""
+    from backend.llm.embedding_factory import EmbeddingFactory
+
+    loaded_before = set(sys.modules)
+    start = time.perf_counter()
+    factory = EmbeddingFactory(provider=provider)
+    constructed = time.perf_counter() - start
+    factory.create_embeddings(["Mevrouw heeft goed geslapen."])
+    first_embedding = time.perf_counter() - start - constructed
+    return {
+        "construct_seconds": constructed,
+        "first_embedding_seconds": first_embedding,
+        "loaded": [
+            m for m in HEAVY_MODULES if m in sys.modules and m not in loaded_before
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding startup cost.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh-interpreter imports")
+    parser.add_argument(
+        "--providers",
+        nargs="*",
+        default=[],
+        help="providers to construct and embed with, e.g. sentence_transformer",
+    )
+    parser.add_argument(
+        "--budget", type=float, help="fail when the import takes longer (seconds)"
+    )
+    args = parser.parse_args()
+
+    # Measure the import before anything is loaded in this process
+    result = measure_import(args.runs)
+    print(
+        f"import backend.llm.embedding_factory: {result['seconds'] * 1000:.0f} ms "
+        f"(best of {args.runs}), heavy modules loaded: {result['loaded'] or 'none'}"
+    )
+
+    for provider in args.providers:
+        try:
+            stats = measure_provider(provider)
+        except Exception as e:
+            print(f"{provider}: skipped ({type(e).__name__}: {e})")
+            continue
+        print(
+            f"{provider}: construct {stats['construct_seconds'] * 1000:.0f} ms, "
+            f"first embedding {stats['first_embedding_seconds'] * 1000:.0f} ms, "
+            f"loaded {stats['loaded'] or 'nothing new'}"
+        )
+
+    if args.budget is not None:
+        if result["loaded"]:
+            print(f"FAIL: importing the factory loads {result['loaded']}")
+            sys.exit(1)
+        if result["seconds"] > args.budget:
+            print(f"FAIL: import took longer than {args.budget:.2f}s")
+            sys.exit(1)
+        print("OK: within budget")
+
+
+if __name__ == "__main__":
+    main()
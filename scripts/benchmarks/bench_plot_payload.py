@@ -0,0 +1,122 @@
+"""
+This script compares the payload of the client embedding plot before and after the compact mode:
+the standalone page (px.scatter with a frame per day and the background inlined as base64, written
+with pio.write_html) against the compact figure JSON sent to st.plotly_chart (scattergl, a frame
+per bucket of days, background referenced as a static file). It reports bytes, frames and
+build + serialisation time. Synthetic notes are used unless --client is given, which reads the
+client's projected notes from the database.
+
+Usage (with PYTHONPATH=app):
+    python scripts/benchmarks/bench_plot_payload.py --notes 500 --days 365
+    python scripts/benchmarks/bench_plot_payload.py --bucket-days 1 7 30
+    python scripts/benchmarks/bench_plot_payload.py --client mag003
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from backend.llm.embedding_visualizer import (
+    plot_client_embeddings,
+    plot_client_embeddings_compact,
+)
+
+root = Path(__file__).resolve().parents[2]
+topic_map_path = root / "app" / "frontend" / "static" / "topic_map.png"
+topic_map_url = "app/static/topic_map.png"
+
+
+def make_plot_data(notes: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """Generate plot data like get_client_plot_data: notes spread over days."""
+    rng = np.random.default_rng(seed)
+    datetimes = pd.Timestamp("2024-01-01") + pd.to_timedelta(
+        np.sort(rng.uniform(0, days * 24 * 3600, notes)), unit="s"
+    )
+    df = pd.DataFrame(
+        {
+            "x": rng.uniform(-6, 12, notes),
+            "y": rng.uniform(-4, 14, notes),
+            "text": [
+                f"Rapportage {i}: " + "mevrouw slaapt goed en eet weinig " * 5
+                for i in range(notes)
+            ],
+            "datetime": datetimes,
+        }
+    )
+    df["time_diff"] = (df["datetime"] - df["datetime"].min()).dt.days
+    df["name"] = "Synthetic client"
+    return df
+
+
+def measure(label: str, build, serialize) -> dict:
+    """Build and serialise a figure; returns size, frames and seconds."""
+    start = time.perf_counter()
+    fig = build()
+    payload = serialize(fig)
+    seconds = time.perf_counter() - start
+    return {
+        "label": label,
+        "bytes": len(payload.encode("utf-8")),
+        "frames": len(fig.frames),
+        "seconds": seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the client plot payload.")
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--bucket-days", type=int, nargs="+", default=[7])
+    parser.add_argument("--client", help="use the projected notes of this client")
+    args = parser.parse_args()
+
+    if args.client:
+        from backend.database.db_connection import Database
+        from backend.services.generate_client_embedding_plot import (
+            get_client_plot_data,
+        )
+
+        df_plot = get_client_plot_data(Database().get_engine(), args.client)
+    else:
+        df_plot = make_plot_data(args.notes, args.days)
+
+    results = [
+        measure(
+            "standalone html (before)",
+            lambda: plot_client_embeddings(df_plot, topic_map_path),
+            lambda fig: pio.to_html(fig, full_html=True),
+        ),
+        measure(
+            "standalone figure json",
+            lambda: plot_client_embeddings(df_plot, topic_map_path),
+            pio.to_json,
+        ),
+    ]
+    for bucket_days in args.bucket_days:
+        results.append(
+            measure(
+                f"compact json, {bucket_days}-day frames",
+                lambda: plot_client_embeddings_compact(
+                    df_plot, topic_map_url, bucket_days=bucket_days
+                ),
+                lambda fig: pio.to_json(fig, validate=False),
+            )
+        )
+
+    print(f"{len(df_plot)} notes over {df_plot['time_diff'].max() + 1} days")
+    before = results[0]["bytes"]
+    print(
+        f"{'payload':<32} {'bytes':>12} {'vs before':>10} {'frames':>7} {'seconds':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['label']:<32} {r['bytes']:>12,} {r['bytes'] / before:>9.1%} "
+            f"{r['frames']:>7} {r['seconds']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
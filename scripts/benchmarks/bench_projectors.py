@@ -0,0 +1,125 @@
+"""
+This script compares the fast projectors (see backend/services/projectors.py) with UMAP.transform
+on the fitted note reducer. The projectors are fitted in memory on the reducer's training data
+and 2D embedding, like fit_reducer.py does. For a set of query embeddings it reports per method:
+- projection time and speed-up against UMAP.transform (excluding numba compilation, reported
+  separately)
+- placement error: euclidean distance to the UMAP.transform position (mean, median, p95), also
+  relative to the size of the 2D layout
+As a baseline for the error, UMAP.transform is run twice: its own run-to-run difference.
+
+Queries are note embeddings from the records table; --no-db uses training embeddings with added
+noise instead. Use the result to choose NOTE_PROJECTOR for the dashboard.
+
+Usage (with PYTHONPATH=app):
+    python scripts/benchmarks/bench_projectors.py --queries 2000
+    python scripts/benchmarks/bench_projectors.py --neighbors 5 10 30 --no-db
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from backend.services.note_projections import (
+    PROJECTION_EMBEDDING_COLUMN,
+    umap_model_path,
+)
+from backend.services.projectors import KNNProjector, LinearProjector
+
+
+def load_queries(n: int, reducer, no_db: bool, noise: float, seed: int = 0):
+    """Return n query embeddings: notes from the database, or noisy training points."""
+    if not no_db:
+        from backend.database.db_connection import Database
+        from backend.database.vector_types import fetch_embedding_matrix
+
+        query = f"""SELECT id, vector_send({PROJECTION_EMBEDDING_COLUMN}) AS embedding
+        FROM records WHERE {PROJECTION_EMBEDDING_COLUMN} IS NOT NULL
+        ORDER BY random() LIMIT :n"""
+        with Database().get_engine().connect() as conn:
+            _, embeddings = fetch_embedding_matrix(conn, query, {"n": n})
+        return embeddings
+
+    rng = np.random.default_rng(seed)
+    train = np.asarray(reducer._raw_data, dtype=np.float32)
+    sample = train[rng.choice(len(train), size=min(n, len(train)), replace=False)]
+    sample = sample + rng.standard_normal(sample.shape).astype(np.float32) * (
+        noise * train.std(axis=0)
+    )
+    return sample
+
+
+def timed(fn, *args):
+    """Return the result and elapsed seconds of fn(*args)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def placement_error(coordinates: np.ndarray, reference: np.ndarray, scale: float):
+    """Distance statistics between two projections of the same points."""
+    distances = np.linalg.norm(coordinates - reference, axis=1)
+    return {
+        "mean": float(distances.mean()),
+        "median": float(np.median(distances)),
+        "p95": float(np.percentile(distances, 95)),
+        "relative_mean": float(distances.mean() / scale),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare projectors with UMAP.")
+    parser.add_argument("--model", type=Path, default=umap_model_path)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--neighbors", type=int, nargs="+", default=[10])
+    parser.add_argument("--alpha", type=float, default=1.0, help="ridge penalty")
+    parser.add_argument("--no-db", action="store_true", help="noisy training points")
+    parser.add_argument("--noise", type=float, default=0.05)
+    args = parser.parse_args()
+
+    reducer = joblib.load(args.model)
+    train_embeddings, train_coordinates = reducer._raw_data, reducer.embedding_
+    queries = load_queries(args.queries, reducer, args.no_db, args.noise)
+    print(
+        f"{len(train_embeddings)} training points, {len(queries)} queries, "
+        f"dimension {queries.shape[1]}"
+    )
+
+    # The first call compiles numba code; measure it separately
+    _, jit_seconds = timed(reducer.transform, queries[:1])
+    reference, umap_seconds = timed(reducer.transform, queries)
+    second_run, second_seconds = timed(reducer.transform, queries)
+    print(f"UMAP.transform compilation (first call): {jit_seconds:.2f}s")
+
+    # Size of the layout: diagonal of the 1-99 percentile box of the training coordinates
+    low, high = np.percentile(train_coordinates, [1, 99], axis=0)
+    scale = float(np.linalg.norm(high - low))
+
+    projectors = {f"knn (k={k})": KNNProjector(n_neighbors=k) for k in args.neighbors}
+    projectors[f"linear (alpha={args.alpha})"] = LinearProjector(alpha=args.alpha)
+
+    rows = [("umap.transform", umap_seconds, None, reference)]
+    rows.append(("umap.transform (2nd run)", second_seconds, None, second_run))
+    for name, projector in projectors.items():
+        _, fit_seconds = timed(projector.fit, train_embeddings, train_coordinates)
+        coordinates, seconds = timed(projector.transform, queries)
+        rows.append((name, seconds, fit_seconds, coordinates))
+
+    print(
+        f"\n{'method':<26} {'fit s':>7} {'project s':>10} {'speed-up':>9} "
+        f"{'mean err':>9} {'median':>8} {'p95':>8} {'rel. mean':>10}"
+    )
+    for name, seconds, fit_seconds, coordinates in rows:
+        error = placement_error(coordinates, reference, scale)
+        fit = f"{fit_seconds:.2f}" if fit_seconds is not None else "-"
+        print(
+            f"{name:<26} {fit:>7} {seconds:>10.3f} {umap_seconds / seconds:>8.1f}x "
+            f"{error['mean']:>9.3f} {error['median']:>8.3f} {error['p95']:>8.3f} "
+            f"{error['relative_mean']:>9.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+This script compares full-precision vector search with two-stage search on compact companion
+columns (see QUANTIZATIONS in backend.database.vector_search). For every quantization and
+re-rank factor it reports recall@k against exact search and the p50/p95 latency next to the
+full-precision (indexed) path, plus the average stored size of each column.
+
+The companion columns must exist and be filled, e.g. by running 02_upsert_embeddings.py with
+quantizations=("halfvec", "binary"). Build indexes on them with
+03_manage_vector_index.py build --quantization ... to benchmark the indexed shortlist.
+
+Usage (with PYTHONPATH=app):
+    python scripts/benchmarks/bench_quantized_search.py --provider sentence_transformer
+    python scripts/benchmarks/bench_quantized_search.py --quantizations binary --factors 2 4 8 16
+    python scripts/benchmarks/bench_quantized_search.py --provider openai --quantizations short256
+"""
+
+import argparse
+import statistics
+
+from backend.config.settings import get_settings
+from backend.database.db_connection import Database
+from backend.database.vector_search import QUANTIZATIONS, get_companion_column
+from bench_utils import fetch_query_vectors, percentile, run_queries
+from sqlalchemy import text
+
+
+def average_column_bytes(engine, table_name: str, column_name: str) -> float:
+    """Average stored size of a column's non-NULL values, in bytes."""
+    with engine.connect() as conn:
+        return float(
+            conn.execute(
+                text(
+                    f"SELECT AVG(pg_column_size({column_name})) FROM {table_name} WHERE {column_name} IS NOT NULL"
+                )
+            ).scalar()
+            or 0.0
+        )
+
+
+def report(label: str, ids, latencies, truth):
+    """Print recall@k and latency percentiles for one configuration."""
+    recall = statistics.mean(
+        len(found & expected) / max(1, len(expected))
+        for found, expected in zip(ids, truth)
+    )
+    print(
+        f"{label:>22} {recall:>8.3f} {statistics.median(latencies):>8.2f} {percentile(latencies, 95):>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark quantized two-stage search."
+    )
+    parser.add_argument("--provider", default="sentence_transformer")
+    parser.add_argument("--table", default="records")
+    parser.add_argument("--distance-op", default="<=>")
+    parser.add_argument(
+        "--quantizations",
+        nargs="+",
+        default=list(QUANTIZATIONS),
+        help="halfvec, binary and/or short<n> (Matryoshka), e.g. short256",
+    )
+    parser.add_argument("--factors", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, default=None)
+    args = parser.parse_args()
+
+    engine = Database().get_engine()
+    column_name = getattr(get_settings().llm, args.provider).embedding_column
+    vectors = fetch_query_vectors(engine, args.table, column_name, args.queries)
+    if not vectors:
+        print("No embeddings found to benchmark.")
+        return
+
+    # Storage per column
+    print(
+        f"{column_name}: {average_column_bytes(engine, args.table, column_name):.0f} B/row"
+    )
+    for quantization in args.quantizations:
+        companion = get_companion_column(column_name, quantization)
+        print(
+            f"{companion}: {average_column_bytes(engine, args.table, companion):.0f} B/row"
+        )
+
+    common = (engine, vectors, args.table, column_name, args.limit, args.distance_op)
+    truth, exact_latencies = run_queries(*common, exact=True)
+    print(
+        f"\n{'mode':>22} {'recall@' + str(args.limit):>8} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    report("exact", truth, exact_latencies, truth)
+    report("full precision", *run_queries(*common, ef_search=args.ef_search), truth)
+
+    for quantization in args.quantizations:
+        for factor in args.factors:
+            ids, latencies = run_queries(
+                *common,
+                ef_search=args.ef_search,
+                quantization=quantization,
+                rerank_factor=factor,
+            )
+            report(f"{quantization} x{factor}", ids, latencies, truth)
+
+
+if __name__ == "__main__":
+    main()
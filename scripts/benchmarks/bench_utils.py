@@ -0,0 +1,54 @@
+"""
+Helpers shared by the search benchmarks (bench_quantized_search.py, bench_embedding_pipeline.py
+and the benchmark action of 03_manage_vector_index.py): sampling stored embeddings as query
+vectors, running them one by one through search_by_embeddings, and latency percentiles.
+"""
+
+import time
+
+from backend.database.vector_search import search_by_embeddings
+from sqlalchemy import text
+
+
+def percentile(values, pct: float) -> float:
+    """Return the pct-th percentile of a list of values."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def fetch_query_vectors(engine, table_name: str, column_name: str, n_queries: int):
+    """Sample stored embeddings to use as benchmark query vectors."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                f"SELECT {column_name}::text FROM {table_name} WHERE {column_name} IS NOT NULL ORDER BY random() LIMIT :n"
+            ),
+            {"n": n_queries},
+        ).fetchall()
+    return [[float(x) for x in row[0].strip("[]").split(",")] for row in rows]
+
+
+def run_queries(
+    engine, vectors, table_name, column_name, limit, distance_op, **options
+):
+    """
+    Run each query vector separately and return the result ids and latencies (ms).
+    Extra options (exact, ef_search, probes, quantization, ...) go to search_by_embeddings.
+    """
+    ids, latencies = [], []
+    for vector in vectors:
+        start = time.perf_counter()
+        result = search_by_embeddings(
+            embeddings=[vector],
+            table=table_name,
+            text_column="id",
+            embedding_column=column_name,
+            engine=engine,
+            limit=limit,
+            distance_op=distance_op,
+            **options,
+        )[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append({row[0] for row in result})
+    return ids, latencies
@@ -0,0 +1,81 @@
+"""
+This script benchmarks decoding pgvector values into NumPy arrays.
+It compares the old path (ast.literal_eval on the text form) with the NumPy text parser used by
+the typecaster and with decoding pgvector's binary format, per row and as one bulk matrix.
+The values are generated locally in the exact formats PostgreSQL returns, so no database is needed.
+
+Usage (with PYTHONPATH=app):
+    python scripts/benchmarks/bench_vector_decode.py --rows 10000 --dim 768
+"""
+
+import argparse
+import ast
+import struct
+import time
+
+import numpy as np
+from backend.database.vector_types import (
+    decode_vector_binary,
+    decode_vector_matrix,
+    parse_vector_text,
+)
+
+
+def make_values(rows: int, dim: int, seed: int = 0):
+    """Generate vectors in pgvector's text and binary formats."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+    header = struct.pack("!hh", dim, 0)
+    text_values = ["[" + ",".join(str(x) for x in v.tolist()) + "]" for v in vectors]
+    binary_values = [header + v.astype(">f4").tobytes() for v in vectors]
+    return vectors, text_values, binary_values
+
+
+def time_it(fn, values):
+    """Return the result and elapsed seconds of fn(values)."""
+    start = time.perf_counter()
+    result = fn(values)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pgvector decoding.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    vectors, text_values, binary_values = make_values(args.rows, args.dim)
+
+    decoders = {
+        "literal_eval (old)": lambda values: np.vstack(
+            [np.array(ast.literal_eval(v), dtype=np.float32) for v in values]
+        ),
+        "numpy text parser": lambda values: np.vstack(
+            [parse_vector_text(v) for v in values]
+        ),
+        "binary per row": lambda values: np.vstack(
+            [decode_vector_binary(v) for v in values]
+        ),
+        "binary matrix": decode_vector_matrix,
+    }
+    inputs = {
+        "literal_eval (old)": text_values,
+        "numpy text parser": text_values,
+        "binary per row": binary_values,
+        "binary matrix": binary_values,
+    }
+
+    print(f"Decoding {args.rows} vectors of dimension {args.dim}")
+    print(f"{'decoder':>20} {'seconds':>9} {'rows/sec':>10} {'speed-up':>9}")
+    baseline = None
+    for name, decode in decoders.items():
+        matrix, seconds = time_it(decode, inputs[name])
+        assert np.allclose(matrix, vectors), f"{name} decoded the wrong values"
+        baseline = baseline or seconds
+        print(
+            f"{name:>20} {seconds:>9.3f} {args.rows / seconds:>10.0f} {baseline / seconds:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
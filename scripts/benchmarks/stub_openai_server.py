@@ -0,0 +1,177 @@
+"""
+This script runs a local stub of the OpenAI embeddings endpoint, so the OpenAI and AzureOpenAI
+embedders can be exercised without a real API. Every POST to a path ending in /embeddings returns
+deterministic vectors (derived from each input's hash) for its "input" list. The stub can add
+latency and answer a fraction of requests with 429 or 500 to exercise retries.
+
+Usage (with PYTHONPATH=app):
+    # Serve the stub and point the OpenAI embedder at it
+    python scripts/benchmarks/stub_openai_server.py --port 8099 --error-rate 0.1
+    OPENAI_BASE_URL=http://localhost:8099/v1 OPENAI_API_KEY=stub python ...
+
+    # Run the embedder against an in-process stub and check order, batching and retries
+    python scripts/benchmarks/stub_openai_server.py --selftest
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def stub_embedding(text: str, dimension: int) -> np.ndarray:
+    """Return a deterministic unit vector for a text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def make_handler(dimension: int, latency: float, error_rate: float, stats: dict):
+    """Build a request handler class with the given behaviour."""
+
+    class StubEmbeddingsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict, headers: dict = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if not self.path.split("?")[0].endswith("/embeddings"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+
+            with stats["lock"]:
+                stats["requests"] += 1
+                stats["max_batch"] = max(stats["max_batch"], len(body["input"]))
+            if latency:
+                time.sleep(latency)
+
+            if random.random() < error_rate:
+                with stats["lock"]:
+                    stats["errors"] += 1
+                status = random.choice([429, 500])
+                self._send_json(
+                    status,
+                    {"error": {"message": "stub error", "type": "stub"}},
+                    {"retry-after": "0"},
+                )
+                return
+
+            inputs = body["input"]
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            use_base64 = body.get("encoding_format") == "base64"
+            data = []
+            for index, text in enumerate(inputs):
+                vector = stub_embedding(text, dimension)
+                embedding = (
+                    base64.b64encode(vector.astype("<f4").tobytes()).decode()
+                    if use_base64
+                    else vector.tolist()
+                )
+                data.append(
+                    {"object": "embedding", "index": index, "embedding": embedding}
+                )
+            # Shuffle to check that clients restore order from "index"
+            random.shuffle(data)
+            tokens = sum(len(text) // 4 + 1 for text in inputs)
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": data,
+                    "model": body.get("model"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                },
+            )
+
+    return StubEmbeddingsHandler
+
+
+def start_server(
+    port: int = 0, dimension: int = 1536, latency: float = 0.0, error_rate: float = 0.0
+):
+    """Start the stub in a background thread; returns (server, stats)."""
+    stats = {"requests": 0, "errors": 0, "max_batch": 0, "lock": threading.Lock()}
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(dimension, latency, error_rate, stats)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def selftest():
+    """Embed texts through the stub with small batches and errors, and check the result."""
+    from backend.config.llm_config import OpenAISettings
+    from backend.llm.embedding_factory import OpenAIEmbedder
+
+    server, stats = start_server(latency=0.01, error_rate=0.2)
+    settings = OpenAISettings(
+        api_key="stub",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        embedding_max_batch_size=16,
+        embedding_max_batch_tokens=200,
+        embedding_concurrency=4,
+        max_retries=10,
+        retry_backoff_seconds=0.01,
+    )
+    texts = [f"Rapportage {i}: " + "mevrouw slaapt goed " * (i % 7) for i in range(300)]
+
+    start = time.perf_counter()
+    embeddings = OpenAIEmbedder(settings).create_embeddings(texts)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    expected = np.vstack(
+        [stub_embedding(t, settings.embedding_dimension) for t in texts]
+    )
+    assert np.allclose(
+        np.asarray(embeddings), expected, atol=1e-6
+    ), "order not preserved"
+    assert stats["max_batch"] <= settings.embedding_max_batch_size
+    print(
+        f"OK: {len(texts)} texts in {stats['requests']} requests "
+        f"({stats['errors']} retried errors, largest batch {stats['max_batch']}) in {elapsed:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI embeddings server.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--selftest", action="store_true")
+    args = parser.parse_args()
+
+    if args.selftest:
+        selftest()
+        return
+
+    server, _ = start_server(args.port, args.dimension, args.latency, args.error_rate)
+    print(f"Stub embeddings server on http://127.0.0.1:{args.port}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
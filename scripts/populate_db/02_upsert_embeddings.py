@@ -1,15 +1,44 @@
 """
 This script populates a specified table in the database with embeddings for text data.
-It ensures the necessary embedding column exists and updates rows where embeddings are missing.
+It ensures the necessary embedding column exists and updates rows where embeddings are missing or stale.
+Each embedding column has companion columns with the md5 hash of the embedded text (<column>_hash) and
+the model version (<column>_model), so a row is re-embedded only when its text or the model changed.
+The text column defaults to 'note'; other text columns get their own embedding column (see
+get_embedding_column_name), which 04_run_embedding_jobs.py uses to embed several tables and columns.
 The embeddings are generated using a specified provider, such as Sentence Transformer or Azure OpenAI.
+Embeddings are written either row by row ("row") or in bulk via a binary COPY into a staging table ("copy").
+The pipelined mode pages through the table by id (keyset) and overlaps fetching, embedding and writing,
+checkpointing its progress so an interrupted run can resume.
 """
 
+import io
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 from backend.database.db_connection import Database
+from backend.database.vector_search import (
+    get_companion_column,
+    get_companion_type,
+    get_short_quantization,
+    quantize_sql,
+)
+from backend.llm.embedding_cache import EmbeddingCache
 from backend.llm.embedding_factory import EmbeddingFactory
+from backend.services.note_projections import update_projections_if_available
 from sqlalchemy import inspect, text
 from tqdm import tqdm
 
+root = Path(__file__).resolve().parents[2]
+checkpoint_folder = root / "output" / "checkpoints"
+embedding_cache_path = root / "output" / "embedding_cache.sqlite"
+
 
 def ensure_vector_extension(engine):
     """Ensure the 'vector' extension is enabled in the database."""
@@ -41,90 +70,648 @@ def add_embedding_column_if_not_exists(
         add_column(engine, table_name, column_name, f"vector({embedding_dimension})")
 
 
+def get_embedding_column_name(
+    embed_factory: EmbeddingFactory, text_column: str = "note"
+):
+    """
+    Return the embedding column for a text column: the provider's column (e.g. nfi_embedding)
+    for 'note', and <text_column>_<provider column> (e.g. scenario_nfi_embedding) otherwise.
+    """
+    column_name = embed_factory.get_embedding_column_name()
+    return column_name if text_column == "note" else f"{text_column}_{column_name}"
+
+
+def add_tracking_columns_if_not_exists(
+    engine,
+    table_name: str,
+    column_name: str,
+    model_version: str,
+    text_column: str = "note",
+):
+    """
+    Add the content hash and model version columns for the embedding column.
+    When they are first added, existing embeddings are assumed current and stamped with
+    the hash of their text and the given model version, so they are not re-embedded.
+    """
+    existing_columns = get_existing_columns(engine, table_name)
+    hash_column, model_column = get_tracking_columns(column_name)
+    if hash_column in existing_columns and model_column in existing_columns:
+        return
+    for tracking_column in (hash_column, model_column):
+        if tracking_column not in existing_columns:
+            add_column(engine, table_name, tracking_column, "text")
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(
+                f"UPDATE {table_name} SET {hash_column} = md5({text_column}), {model_column} = :model_version WHERE {column_name} IS NOT NULL AND {hash_column} IS NULL"
+            ),
+            {"model_version": model_version},
+        )
+    print(f"Stamped {result.rowcount} existing embeddings with their text hash")
+
+
+def get_tracking_columns(column_name: str):
+    """Return the names of the content hash and model version columns."""
+    return f"{column_name}_hash", f"{column_name}_model"
+
+
+def needs_embedding_sql(column_name: str, text_column: str = "note") -> str:
+    """
+    SQL condition for rows to (re-)embed: a non-empty text whose embedding is missing, was
+    computed from different text, or by a different model version (:model_version).
+    """
+    hash_column, model_column = get_tracking_columns(column_name)
+    return (
+        f"{text_column} IS NOT NULL AND {text_column} != '' AND ({column_name} IS NULL"
+        f" OR {hash_column} IS DISTINCT FROM md5({text_column})"
+        f" OR {model_column} IS DISTINCT FROM :model_version)"
+    )
+
+
+def add_companion_columns_if_not_exists(
+    engine, table_name: str, column_name: str, embedding_dimension: int, quantizations
+):
+    """Add compact companion columns (e.g. halfvec, binary) for the embedding column."""
+    existing_columns = get_existing_columns(engine, table_name)
+    for quantization in quantizations:
+        companion = get_companion_column(column_name, quantization)
+        if companion not in existing_columns:
+            add_column(
+                engine,
+                table_name,
+                companion,
+                get_companion_type(quantization, embedding_dimension),
+            )
+
+
+def companion_assignments(column_name: str, source: str, quantizations) -> str:
+    """SET clauses that derive the companion columns from a full-precision vector expression."""
+    return "".join(
+        f", {get_companion_column(column_name, q)} = {quantize_sql(source, q)}"
+        for q in quantizations
+    )
+
+
+def backfill_companion_columns(
+    engine, table_name: str, column_name: str, quantizations
+):
+    """Derive missing companion values for rows that already have an embedding."""
+    for quantization in quantizations:
+        companion = get_companion_column(column_name, quantization)
+        with engine.begin() as conn:
+            result = conn.execute(
+                text(
+                    f"UPDATE {table_name} SET {companion} = {quantize_sql(column_name, quantization)} WHERE {column_name} IS NOT NULL AND {companion} IS NULL"
+                )
+            )
+        print(f"Backfilled {companion} for {result.rowcount} rows")
+
+
 def fetch_rows_for_embedding(
-    engine, table_name: str, column_name: str, batch_size: int
+    engine,
+    table_name: str,
+    column_name: str,
+    batch_size: int,
+    model_version: str,
+    text_column: str = "note",
+):
+    """Fetch a batch of rows whose embedding is missing or stale, with the hash of their text."""
+    with engine.connect() as conn:
+        result = pd.read_sql(
+            text(
+                f"SELECT id, {text_column}, md5({text_column}) AS text_hash FROM {table_name} WHERE {needs_embedding_sql(column_name, text_column)} LIMIT :limit"
+            ),
+            conn,
+            params={"limit": batch_size, "model_version": model_version},
+        )
+    return result
+
+
+def fetch_rows_after(
+    engine,
+    table_name: str,
+    column_name: str,
+    last_id: int,
+    batch_size: int,
+    model_version: str,
+    text_column: str = "note",
 ):
-    """Fetch a batch of rows where the embedding column is NULL and the 'note' column is not empty."""
+    """Fetch the next batch of rows to (re-)embed after last_id, in id order (keyset pagination)."""
     with engine.connect() as conn:
         result = pd.read_sql(
             text(
-                f"SELECT id, note FROM {table_name} WHERE {column_name} IS NULL AND note IS NOT NULL AND note != '' LIMIT :limit"
+                f"SELECT id, {text_column}, md5({text_column}) AS text_hash FROM {table_name} WHERE id > :last_id AND {needs_embedding_sql(column_name, text_column)} ORDER BY id LIMIT :limit"
             ),
             conn,
-            params={"limit": batch_size},
+            params={
+                "last_id": last_id,
+                "limit": batch_size,
+                "model_version": model_version,
+            },
         )
     return result
 
 
-def update_row_embeddings(engine, table_name: str, column_name: str, rows, embeddings):
-    """Update the embedding column for a batch of rows."""
+def update_row_embeddings(
+    engine,
+    table_name: str,
+    column_name: str,
+    rows,
+    embeddings,
+    model_version: str,
+    quantizations=(),
+):
+    """Update the embedding column (and its companion columns) for a batch of rows."""
+    hash_column, model_column = get_tracking_columns(column_name)
+    companions = companion_assignments(
+        column_name, "CAST(:embedding AS vector)", quantizations
+    )
     with engine.begin() as conn:
         for i, (_, row) in enumerate(rows.iterrows()):
             conn.execute(
                 text(
-                    f"UPDATE {table_name} SET {column_name} = :embedding WHERE id = :id"
+                    f"UPDATE {table_name} SET {column_name} = :embedding{companions}, {hash_column} = :text_hash, {model_column} = :model_version WHERE id = :id"
                 ),
-                {"embedding": embeddings[i], "id": row["id"]},
+                {
+                    "embedding": np.asarray(embeddings[i]).tolist(),
+                    "text_hash": row["text_hash"],
+                    "model_version": model_version,
+                    "id": row["id"],
+                },
+            )
+
+
+# Header of PostgreSQL's binary COPY format: signature, flags and header extension length
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+
+
+def encode_copy_binary(ids, embeddings, hashes) -> bytes:
+    """
+    Encode (id, vector, text hash) rows in PostgreSQL's binary COPY format.
+    Vectors use pgvector's binary representation (int16 dim, int16 unused, float4 values),
+    so they are never converted to text on either side.
+    """
+    vectors = np.asarray(embeddings, dtype=">f4")
+    dim = vectors.shape[1]
+    vector_header = struct.pack("!hh", dim, 0)
+    # Each tuple: field count, then (length, bigint id), then (length, vector), then (length, text)
+    tuple_header = struct.Struct("!hiqi")
+    vector_length = 4 + 4 * dim
+
+    buf = io.BytesIO()
+    buf.write(PGCOPY_HEADER)
+    for row_id, vector, text_hash in zip(ids, vectors, hashes):
+        encoded_hash = text_hash.encode("utf-8")
+        buf.write(tuple_header.pack(3, 8, int(row_id), vector_length))
+        buf.write(vector_header)
+        buf.write(vector.tobytes())
+        buf.write(struct.pack("!i", len(encoded_hash)))
+        buf.write(encoded_hash)
+    buf.write(PGCOPY_TRAILER)
+    return buf.getvalue()
+
+
+def copy_row_embeddings(
+    engine,
+    table_name: str,
+    column_name: str,
+    rows,
+    embeddings,
+    model_version: str,
+    quantizations=(),
+):
+    """Update the embedding column for a batch of rows with COPY into a staging table and one UPDATE ... FROM."""
+    dim = len(embeddings[0])
+    hash_column, model_column = get_tracking_columns(column_name)
+    companions = companion_assignments(column_name, "s.embedding", quantizations)
+    payload = encode_copy_binary(
+        rows["id"].tolist(), embeddings, rows["text_hash"].tolist()
+    )
+
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TEMP TABLE embedding_staging (id bigint, embedding vector({dim}), text_hash text) ON COMMIT DROP"
+            )
+            cur.copy_expert(
+                "COPY embedding_staging (id, embedding, text_hash) FROM STDIN WITH (FORMAT binary)",
+                io.BytesIO(payload),
+            )
+            cur.execute(
+                f"UPDATE {table_name} AS t SET {column_name} = s.embedding{companions}, {hash_column} = s.text_hash, {model_column} = %s FROM embedding_staging AS s WHERE t.id = s.id",
+                (model_version,),
             )
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
 
 
-def count_null_embeddings(engine, table_name: str, column_name: str):
-    """Count the total number of rows where the embedding column is NULL."""
+# Available strategies for writing a batch of embeddings
+WRITERS = {"row": update_row_embeddings, "copy": copy_row_embeddings}
+
+
+def count_rows_to_embed(
+    engine,
+    table_name: str,
+    column_name: str,
+    model_version: str,
+    text_column: str = "note",
+):
+    """Count the rows whose embedding is missing or stale."""
     with engine.connect() as conn:
         return (
             conn.execute(
-                text(f"SELECT COUNT(*) FROM {table_name} WHERE {column_name} IS NULL")
+                text(
+                    f"SELECT COUNT(*) FROM {table_name} WHERE {needs_embedding_sql(column_name, text_column)}"
+                ),
+                {"model_version": model_version},
             ).scalar()
             or 0
         )
 
 
 def update_embeddings(
-    engine, table_name: str, embed_factory: EmbeddingFactory, batch_size: int = 5
+    engine,
+    table_name: str,
+    embed_factory: EmbeddingFactory,
+    batch_size: int = 5,
+    writer: str = "row",
+    quantizations=(),
+    text_column: str = "note",
 ):
-    """Update the specified table with embeddings for rows where the embedding column is NULL."""
-    column_name = embed_factory.get_embedding_column_name()
-    total = count_null_embeddings(engine, table_name, column_name)
+    """Update the specified table with embeddings for rows whose embedding is missing or stale."""
+    if writer not in WRITERS:
+        raise ValueError(f"Unsupported writer: {writer}")
+    write_batch = WRITERS[writer]
+
+    column_name = get_embedding_column_name(embed_factory, text_column)
+    model_version = embed_factory.get_model_version()
+    total = count_rows_to_embed(
+        engine, table_name, column_name, model_version, text_column
+    )
     total_batches = (total + batch_size - 1) // batch_size
     pbar = tqdm(total=total_batches, desc="Embedding batches", unit="batch")
+    rows_written = 0
+    write_seconds = 0.0
 
     while True:
-        rows = fetch_rows_for_embedding(engine, table_name, column_name, batch_size)
+        rows = fetch_rows_for_embedding(
+            engine, table_name, column_name, batch_size, model_version, text_column
+        )
         if rows.empty:
             break
 
-        embeddings = embed_factory.create_embeddings(texts=rows["note"].tolist())
-        update_row_embeddings(engine, table_name, column_name, rows, embeddings)
+        embeddings = embed_factory.create_embeddings(texts=rows[text_column].tolist())
+        start = time.perf_counter()
+        write_batch(
+            engine,
+            table_name,
+            column_name,
+            rows,
+            embeddings,
+            model_version,
+            quantizations,
+        )
+        write_seconds += time.perf_counter() - start
+        rows_written += len(rows)
         pbar.update(1)
 
     pbar.close()
+    report_write_throughput(writer, rows_written, write_seconds)
+    return rows_written, write_seconds
 
 
-def initialize_database_and_factory(provider: str):
-    """Initialize the database connection and embedding factory."""
-    db = Database()
-    engine = db.get_engine()
-    embed_factory = EmbeddingFactory(provider=provider)
-    return engine, embed_factory
+def report_write_throughput(writer: str, rows_written: int, write_seconds: float):
+    """Print the database write throughput of a writer."""
+    rate = rows_written / write_seconds if write_seconds else 0.0
+    print(
+        f"[{writer}] wrote {rows_written} rows in {write_seconds:.2f}s ({rate:.0f} rows/sec)"
+    )
+
 
+def get_checkpoint_path(table_name: str, column_name: str) -> Path:
+    """Return the default checkpoint file for a table/column backfill."""
+    return checkpoint_folder / f"{table_name}_{column_name}.json"
 
-def main(provider: str = "sentence_transformer", table_name: str = "records"):
-    """Main function to add the embedding column (if needed) and update embeddings."""
-    engine, embed_factory = initialize_database_and_factory(provider)
+
+def get_failed_ids_path(checkpoint_path: Path) -> Path:
+    """Return the file that keeps the ids that failed to embed in the last run."""
+    return checkpoint_path.with_name(f"{checkpoint_path.stem}_failed.json")
+
+
+def load_checkpoint(checkpoint_path: Path) -> dict:
+    """Load a backfill checkpoint, or start from the beginning if there is none."""
+    if checkpoint_path.exists():
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"last_id": 0, "failed_ids": []}
+
+
+def save_checkpoint(checkpoint_path: Path, checkpoint: dict):
+    """Atomically write a backfill checkpoint."""
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = checkpoint_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _put(q: queue.Queue, item, stop_event: threading.Event) -> bool:
+    """Put an item on a bounded queue, giving up when the pipeline is stopped."""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def update_embeddings_pipelined(
+    engine,
+    table_name: str,
+    embed_factory: EmbeddingFactory,
+    batch_size: int = 50,
+    writer: str = "copy",
+    embed_workers: int = 1,
+    queue_size: int = 4,
+    checkpoint_path: Path = None,
+    quantizations=(),
+    text_column: str = "note",
+    progress_position: int = 0,
+):
+    """
+    Backfill embeddings with fetching, embedding and writing running concurrently.
+
+    A fetcher thread pages through the table by id (keyset), so every query picks up
+    where the previous one stopped instead of rescanning from the start. Batches flow
+    through bounded queues to one or more embedding workers and on to the writer on
+    the calling thread. The checkpoint records the highest id up to which all batches
+    are written; an interrupted run resumes from there. Batches that fail to embed are
+    skipped; their ids are kept in the checkpoint and, when the run completes, in a
+    <checkpoint>_failed.json file. The next run retries them, since their embedding is
+    still missing or outdated.
+    progress_position places the progress bar when several backfills run at once.
+    """
+    if writer not in WRITERS:
+        raise ValueError(f"Unsupported writer: {writer}")
+    write_batch = WRITERS[writer]
+
+    column_name = get_embedding_column_name(embed_factory, text_column)
+    checkpoint_path = checkpoint_path or get_checkpoint_path(table_name, column_name)
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint["last_id"]:
+        print(f"Resuming from checkpoint at id {checkpoint['last_id']}")
+
+    model_version = embed_factory.get_model_version()
+    total = count_rows_to_embed(
+        engine, table_name, column_name, model_version, text_column
+    )
+    pbar = tqdm(
+        total=total,
+        desc=f"{table_name}.{text_column}",
+        unit="row",
+        position=progress_position,
+    )
+
+    embed_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    errors = []
+
+    def fetch():
+        # Produce (sequence number, rows) batches in id order
+        last_id = checkpoint["last_id"]
+        seq = 0
+        try:
+            while not stop_event.is_set():
+                rows = fetch_rows_after(
+                    engine,
+                    table_name,
+                    column_name,
+                    last_id,
+                    batch_size,
+                    model_version,
+                    text_column,
+                )
+                if rows.empty:
+                    break
+                if not _put(embed_queue, (seq, rows), stop_event):
+                    return
+                last_id = int(rows["id"].iloc[-1])
+                seq += 1
+        except Exception as e:
+            errors.append(e)
+            stop_event.set()
+        finally:
+            for _ in range(embed_workers):
+                _put(embed_queue, None, stop_event)
+
+    def embed():
+        while True:
+            try:
+                item = embed_queue.get(timeout=0.5)
+            except queue.Empty:
+                if stop_event.is_set():
+                    return
+                continue
+            if item is None:
+                _put(write_queue, None, stop_event)
+                return
+            seq, rows = item
+            try:
+                embeddings = embed_factory.create_embeddings(
+                    texts=rows[text_column].tolist()
+                )
+            except Exception as e:
+                print(f"Embedding failed for ids {rows['id'].tolist()}: {e}")
+                embeddings = None
+            if not _put(write_queue, (seq, rows, embeddings), stop_event):
+                return
+
+    threads = [threading.Thread(target=fetch, daemon=True)] + [
+        threading.Thread(target=embed, daemon=True) for _ in range(embed_workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Batches can finish out of order with several workers; the checkpoint only
+    # advances over a contiguous run of completed batches.
+    completed = {}
+    next_seq = 0
+    finished_workers = 0
+    rows_written = 0
+    write_seconds = 0.0
+    try:
+        while finished_workers < embed_workers and not stop_event.is_set():
+            try:
+                item = write_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                finished_workers += 1
+                continue
+
+            seq, rows, embeddings = item
+            if embeddings is None:
+                checkpoint["failed_ids"].extend(int(i) for i in rows["id"])
+            else:
+                start = time.perf_counter()
+                write_batch(
+                    engine,
+                    table_name,
+                    column_name,
+                    rows,
+                    embeddings,
+                    model_version,
+                    quantizations,
+                )
+                write_seconds += time.perf_counter() - start
+                rows_written += len(rows)
+            pbar.update(len(rows))
+
+            completed[seq] = int(rows["id"].iloc[-1])
+            while next_seq in completed:
+                checkpoint["last_id"] = completed.pop(next_seq)
+                next_seq += 1
+            save_checkpoint(checkpoint_path, checkpoint)
+    except BaseException:
+        stop_event.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+        pbar.close()
+
+    if errors:
+        raise errors[0]
+
+    report_write_throughput(writer, rows_written, write_seconds)
+    failed_ids_path = get_failed_ids_path(checkpoint_path)
+    if checkpoint["failed_ids"]:
+        save_checkpoint(failed_ids_path, {"failed_ids": checkpoint["failed_ids"]})
+        print(
+            f"{len(checkpoint['failed_ids'])} rows failed to embed and will be retried on the next run; "
+            f"ids written to {failed_ids_path}"
+        )
+    else:
+        failed_ids_path.unlink(missing_ok=True)
+    # The run is complete: the next run starts from the beginning and retries failed rows
+    checkpoint_path.unlink(missing_ok=True)
+    return rows_written, write_seconds
+
+
+def prepare_embedding_columns(
+    engine,
+    table_name: str,
+    embed_factory: EmbeddingFactory,
+    text_column: str = "note",
+    quantizations=(),
+):
+    """
+    Add the embedding, tracking and companion columns for a text column if needed.
+    Returns the quantizations to maintain, including the provider's Matryoshka column.
+    """
+    column_name = get_embedding_column_name(embed_factory, text_column)
+    short_quantization = get_short_quantization(embed_factory.settings)
+    if short_quantization and short_quantization not in quantizations:
+        quantizations = (*quantizations, short_quantization)
     add_embedding_column_if_not_exists(
         engine=engine,
         table_name=table_name,
-        column_name=embed_factory.get_embedding_column_name(),
+        column_name=column_name,
         embedding_dimension=embed_factory.get_dimension(),
     )
-    update_embeddings(
-        engine=engine, table_name=table_name, embed_factory=embed_factory, batch_size=50
+    add_tracking_columns_if_not_exists(
+        engine,
+        table_name,
+        column_name,
+        embed_factory.get_model_version(),
+        text_column,
+    )
+    if quantizations:
+        add_companion_columns_if_not_exists(
+            engine,
+            table_name,
+            column_name,
+            embed_factory.get_dimension(),
+            quantizations,
+        )
+        backfill_companion_columns(engine, table_name, column_name, quantizations)
+    return quantizations
+
+
+def initialize_database_and_factory(provider: str, use_cache: bool = False):
+    """Initialize the database connection and embedding factory (optionally with an embedding cache)."""
+    db = Database()
+    engine = db.get_engine()
+    cache = EmbeddingCache(embedding_cache_path) if use_cache else None
+    embed_factory = EmbeddingFactory(provider=provider, cache=cache)
+    return engine, embed_factory
+
+
+def main(
+    provider: str = "sentence_transformer",
+    table_name: str = "records",
+    writer: str = "copy",
+    pipelined: bool = False,
+    embed_workers: int = 1,
+    use_cache: bool = True,
+    quantizations=(),
+):
+    """
+    Main function to add the embedding column (if needed) and update embeddings.
+    quantizations lists compact companion columns ("halfvec", "binary") to maintain as well.
+    Providers with a short_embedding_dimension also get their Matryoshka column ("short<n>").
+    """
+    engine, embed_factory = initialize_database_and_factory(provider, use_cache)
+    quantizations = prepare_embedding_columns(
+        engine, table_name, embed_factory, quantizations=quantizations
+    )
+    if pipelined:
+        update_embeddings_pipelined(
+            engine=engine,
+            table_name=table_name,
+            embed_factory=embed_factory,
+            batch_size=50,
+            writer=writer,
+            embed_workers=embed_workers,
+            quantizations=quantizations,
+        )
+    else:
+        update_embeddings(
+            engine=engine,
+            table_name=table_name,
+            embed_factory=embed_factory,
+            batch_size=50,
+            writer=writer,
+            quantizations=quantizations,
+        )
+    # Keep the precomputed 2D coordinates of new and changed notes up to date
+    if table_name == "records":
+        update_projections_if_available(
+            engine, embed_factory.get_embedding_column_name()
+        )
+    if embed_factory.cache is not None:
+        print(f"Embedding cache: {embed_factory.cache.stats()}")
+    sentences_per_sec = getattr(
+        embed_factory.embedding_provider, "sentences_per_sec", None
     )
+    if sentences_per_sec:
+        print(f"Encoding throughput: {sentences_per_sec:.1f} sentences/sec")
 
 
 if __name__ == "__main__":
+    # Use writer="row" to compare against the per-row UPDATE path,
+    # and pipelined=True for a resumable backfill that overlaps fetch, embed and write.
+    # Add quantizations=("halfvec",) or ("binary",) to maintain compact companion columns
     # Uncomment the line below to use Azure OpenAI as the embedding provider
-    main(provider="azureopenai", table_name="records")
+    main(provider="azureopenai", table_name="records", writer="copy")
     # main(
     #     provider="sentence_transformer", table_name="records"
     # )  # Default to using Sentence Transformer
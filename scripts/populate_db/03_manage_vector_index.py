@@ -0,0 +1,283 @@
+"""
+This script manages approximate nearest neighbour (ANN) indexes on the embedding columns.
+It can build, rebuild and drop HNSW or IVFFlat indexes, using the operator class that matches
+the distance operator used by vector_search, and it can benchmark recall against latency for
+a range of ef_search / probes values compared to exact (sequential scan) search.
+
+Usage (with PYTHONPATH=app):
+    python scripts/populate_db/03_manage_vector_index.py build --method hnsw --distance-op "<=>"
+    python scripts/populate_db/03_manage_vector_index.py rebuild --method ivfflat --lists 100
+    python scripts/populate_db/03_manage_vector_index.py drop --method hnsw
+    python scripts/populate_db/03_manage_vector_index.py benchmark --method hnsw --values 10 20 40 80
+
+    # Index a compact companion column (see 02_upsert_embeddings.py) for two-stage search
+    python scripts/populate_db/03_manage_vector_index.py build --method hnsw --quantization binary
+    python scripts/populate_db/03_manage_vector_index.py build --provider openai --quantization short256
+"""
+
+import argparse
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from backend.config.settings import get_settings
+from backend.database.db_connection import Database
+from backend.database.vector_search import (
+    DISTANCE_OPCLASSES,
+    get_companion_column,
+    get_companion_opclass,
+)
+from sqlalchemy import text
+
+# Query helpers shared with the other search benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+from bench_utils import fetch_query_vectors, percentile, run_queries
+
+# Session setting that tunes each index method at query time
+TUNING_PARAMETERS = {"hnsw": "ef_search", "ivfflat": "probes"}
+
+
+def get_index_name(table_name: str, column_name: str, method: str) -> str:
+    """Return the conventional name of the ANN index for a column."""
+    return f"{table_name}_{column_name}_{method}_idx"
+
+
+def get_index_state(engine, index_name: str):
+    """
+    Return the access method, operator class and validity of an index as a dict, or None if
+    it does not exist. A failed CREATE INDEX CONCURRENTLY leaves an invalid index behind,
+    which the planner ignores.
+    """
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                """SELECT am.amname AS method, opc.opcname AS opclass, i.indisvalid AS valid
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_am am ON am.oid = c.relam
+                JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+                WHERE i.indexrelid = to_regclass(:index_name)"""
+            ),
+            {"index_name": index_name},
+        ).first()
+    return dict(row._mapping) if row else None
+
+
+def count_rows(engine, table_name: str, column_name: str) -> int:
+    """Count the rows that have an embedding in the given column."""
+    with engine.connect() as conn:
+        return (
+            conn.execute(
+                text(
+                    f"SELECT COUNT(*) FROM {table_name} WHERE {column_name} IS NOT NULL"
+                )
+            ).scalar()
+            or 0
+        )
+
+
+def default_ivfflat_lists(row_count: int) -> int:
+    """pgvector's guideline: rows / 1000 up to 1M rows, sqrt(rows) above that."""
+    if row_count > 1_000_000:
+        return int(math.sqrt(row_count))
+    return max(1, row_count // 1000)
+
+
+def build_index(
+    engine,
+    table_name: str,
+    column_name: str,
+    method: str = "hnsw",
+    distance_op: str = "<->",
+    m: int = 16,
+    ef_construction: int = 64,
+    lists: int = None,
+    concurrently: bool = True,
+    opclass: str = None,
+):
+    """
+    Create an HNSW or IVFFlat index on the embedding column.
+    opclass overrides the operator class, e.g. for halfvec or bit companion columns.
+    """
+    if method not in TUNING_PARAMETERS:
+        raise ValueError(f"Unsupported index method: {method}")
+    if opclass is None and distance_op not in DISTANCE_OPCLASSES:
+        raise ValueError(f"Unsupported distance operator: {distance_op}")
+
+    opclass = opclass or DISTANCE_OPCLASSES[distance_op]
+    if method == "hnsw":
+        with_clause = f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+    else:
+        lists = lists or default_ivfflat_lists(
+            count_rows(engine, table_name, column_name)
+        )
+        with_clause = f"WITH (lists = {int(lists)})"
+
+    index_name = get_index_name(table_name, column_name, method)
+    state = get_index_state(engine, index_name)
+    if state and not state["valid"]:
+        # IF NOT EXISTS would keep the invalid index left by a failed build
+        print(f"Dropping invalid index {index_name}")
+        drop_index(engine, table_name, column_name, method, concurrently)
+    elif state and (state["method"], state["opclass"]) != (method, opclass):
+        print(
+            f"{index_name} exists as {state['method']} ({state['opclass']}); "
+            f"use 'rebuild' to replace it with {method} ({opclass})."
+        )
+        return
+    query = f"""CREATE INDEX {"CONCURRENTLY" if concurrently else ""} IF NOT EXISTS {index_name}
+    ON {table_name} USING {method} ({column_name} {opclass}) {with_clause};"""
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    start = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(query))
+    print(f"Built {index_name} ({opclass}) in {time.perf_counter() - start:.1f}s")
+
+
+def drop_index(
+    engine, table_name: str, column_name: str, method: str, concurrently: bool = True
+):
+    """Drop the ANN index on the embedding column if it exists."""
+    index_name = get_index_name(table_name, column_name, method)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(
+            text(
+                f"DROP INDEX {'CONCURRENTLY' if concurrently else ''} IF EXISTS {index_name};"
+            )
+        )
+    print(f"Dropped {index_name}")
+
+
+def benchmark_index(
+    engine,
+    table_name: str,
+    column_name: str,
+    method: str,
+    values,
+    distance_op: str = "<->",
+    limit: int = 10,
+    n_queries: int = 100,
+):
+    """Print recall@k and latency for each tuning value against exact search."""
+    # Without a matching valid index the "ANN" queries are exact scans with recall 1.0
+    index_name = get_index_name(table_name, column_name, method)
+    opclass = DISTANCE_OPCLASSES[distance_op]
+    state = get_index_state(engine, index_name)
+    if state is None:
+        raise SystemExit(f"{index_name} does not exist; build it first.")
+    if not state["valid"]:
+        raise SystemExit(f"{index_name} is invalid (failed build); rebuild it first.")
+    if (state["method"], state["opclass"]) != (method, opclass):
+        raise SystemExit(
+            f"{index_name} is {state['method']} ({state['opclass']}) and does not serve "
+            f'{distance_op}; rebuild it with --distance-op "{distance_op}" ({opclass}).'
+        )
+
+    vectors = fetch_query_vectors(engine, table_name, column_name, n_queries)
+    if not vectors:
+        print("No embeddings found to benchmark.")
+        return
+
+    exact_ids, exact_latencies = run_queries(
+        engine, vectors, table_name, column_name, limit, distance_op, exact=True
+    )
+    knob = TUNING_PARAMETERS[method]
+    print(f"{'setting':>16} {'recall@' + str(limit):>10} {'p50 ms':>8} {'p95 ms':>8}")
+    print(
+        f"{'exact':>16} {1.0:>10.3f} {statistics.median(exact_latencies):>8.2f} {percentile(exact_latencies, 95):>8.2f}"
+    )
+
+    for value in values:
+        ann_ids, latencies = run_queries(
+            engine,
+            vectors,
+            table_name,
+            column_name,
+            limit,
+            distance_op,
+            **{knob: value},
+        )
+        recall = statistics.mean(
+            len(found & truth) / max(1, len(truth))
+            for found, truth in zip(ann_ids, exact_ids)
+        )
+        print(
+            f"{knob + '=' + str(value):>16} {recall:>10.3f} {statistics.median(latencies):>8.2f} {percentile(latencies, 95):>8.2f}"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage pgvector ANN indexes.")
+    parser.add_argument("action", choices=["build", "rebuild", "drop", "benchmark"])
+    parser.add_argument("--provider", default="sentence_transformer")
+    parser.add_argument("--table", default="records")
+    parser.add_argument("--method", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument(
+        "--distance-op", choices=list(DISTANCE_OPCLASSES), default="<->"
+    )
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument(
+        "--quantization",
+        default=None,
+        help="build/drop the index on this companion column instead: halfvec, binary or short<n>",
+    )
+    parser.add_argument(
+        "--values",
+        type=int,
+        nargs="+",
+        default=[10, 20, 40, 80, 160],
+        help="ef_search (hnsw) or probes (ivfflat) values to benchmark",
+    )
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    return parser.parse_args()
+
+
+def main():
+    """Main function to build, rebuild, drop or benchmark an ANN index."""
+    args = parse_args()
+    engine = Database().get_engine()
+    column_name = getattr(get_settings().llm, args.provider).embedding_column
+    opclass = None
+    if args.quantization:
+        if args.action == "benchmark":
+            raise SystemExit(
+                "Use scripts/benchmarks/bench_quantized_search.py to benchmark quantized search."
+            )
+        opclass = get_companion_opclass(args.quantization, args.distance_op)
+        column_name = get_companion_column(column_name, args.quantization)
+
+    if args.action in ("drop", "rebuild"):
+        drop_index(engine, args.table, column_name, args.method)
+    if args.action in ("build", "rebuild"):
+        build_index(
+            engine,
+            args.table,
+            column_name,
+            method=args.method,
+            distance_op=args.distance_op,
+            m=args.m,
+            ef_construction=args.ef_construction,
+            lists=args.lists,
+            opclass=opclass,
+        )
+    if args.action == "benchmark":
+        benchmark_index(
+            engine,
+            args.table,
+            column_name,
+            method=args.method,
+            values=args.values,
+            distance_op=args.distance_op,
+            limit=args.limit,
+            n_queries=args.queries,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+This script runs embedding backfills for several (table, text column, provider) jobs, e.g. the
+notes in records, the scenarios and the free-text fields of the client profiles.
+
+It builds on 02_upsert_embeddings.py: every job is a resumable, pipelined backfill with its own
+checkpoint that only (re-)embeds rows whose text or model changed. Jobs with the same provider
+share one loaded model (through the model registry) and one embedding cache. Independent jobs
+run in parallel, at most --max-parallel at a time, and a summary with rows and throughput per
+job is printed at the end. A failing job is reported without stopping the others.
+
+Usage (with PYTHONPATH=app):
+    python scripts/populate_db/04_run_embedding_jobs.py
+    python scripts/populate_db/04_run_embedding_jobs.py --jobs records.note:sentence_transformer scenarios.scenario:openai
+    python scripts/populate_db/04_run_embedding_jobs.py --max-parallel 3 --writer row
+"""
+
+import argparse
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from backend.database.db_connection import Database
+from backend.llm.embedding_cache import EmbeddingCache
+from backend.llm.embedding_factory import EmbeddingFactory
+from backend.services.note_projections import update_projections_if_available
+
+# The upsert script's module name starts with a digit, so it cannot be imported directly
+upsert = importlib.import_module("02_upsert_embeddings")
+
+
+@dataclass(frozen=True)
+class EmbeddingJob:
+    """One backfill: embed table.text_column with a provider."""
+
+    table: str
+    text_column: str
+    provider: str = "sentence_transformer"
+
+    @property
+    def name(self) -> str:
+        return f"{self.table}.{self.text_column}:{self.provider}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "EmbeddingJob":
+        """Parse 'table.text_column[:provider]'."""
+        target, _, provider = spec.partition(":")
+        table, _, text_column = target.partition(".")
+        if not table or not text_column:
+            raise ValueError(f"Invalid job '{spec}', expected table.column[:provider]")
+        return cls(table, text_column, provider or "sentence_transformer")
+
+
+DEFAULT_JOBS = [
+    EmbeddingJob("records", "note"),
+    EmbeddingJob("scenarios", "scenario"),
+    EmbeddingJob("clients", "physical"),
+    EmbeddingJob("clients", "adl"),
+    EmbeddingJob("clients", "mobility"),
+    EmbeddingJob("clients", "behavior"),
+]
+
+
+def run_job(
+    engine,
+    job: EmbeddingJob,
+    embed_factory: EmbeddingFactory,
+    quantizations,
+    position: int,
+    writer: str = "copy",
+    batch_size: int = 50,
+    embed_workers: int = 1,
+) -> dict:
+    """Run one pipelined backfill and return its statistics."""
+    start = time.perf_counter()
+    try:
+        rows_written, write_seconds = upsert.update_embeddings_pipelined(
+            engine=engine,
+            table_name=job.table,
+            embed_factory=embed_factory,
+            batch_size=batch_size,
+            writer=writer,
+            embed_workers=embed_workers,
+            quantizations=quantizations,
+            text_column=job.text_column,
+            progress_position=position,
+        )
+        error = None
+    except Exception as e:
+        rows_written, write_seconds, error = 0, 0.0, e
+    return {
+        "job": job.name,
+        "rows": rows_written,
+        "seconds": time.perf_counter() - start,
+        "write_seconds": write_seconds,
+        "error": error,
+    }
+
+
+def run_jobs(
+    jobs,
+    max_parallel: int = 2,
+    writer: str = "copy",
+    batch_size: int = 50,
+    embed_workers: int = 1,
+    use_cache: bool = True,
+):
+    """
+    Prepare the columns of all jobs, then run the jobs in parallel.
+
+    Returns:
+        list: One statistics dict per job, in job order.
+    """
+    engine = Database().get_engine()
+    cache = EmbeddingCache(upsert.embedding_cache_path) if use_cache else None
+
+    # Factories with the same provider share their model through the model registry.
+    # Schema changes run one at a time, before any backfill starts.
+    prepared = []
+    for job in jobs:
+        embed_factory = EmbeddingFactory(provider=job.provider, cache=cache)
+        quantizations = upsert.prepare_embedding_columns(
+            engine, job.table, embed_factory, text_column=job.text_column
+        )
+        prepared.append((job, embed_factory, quantizations))
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        futures = {
+            executor.submit(
+                run_job,
+                engine,
+                job,
+                embed_factory,
+                quantizations,
+                position,
+                writer,
+                batch_size,
+                embed_workers,
+            ): job
+            for position, (job, embed_factory, quantizations) in enumerate(prepared)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    # Project new and changed notes to 2D once their embeddings are written
+    for job, embed_factory, _ in prepared:
+        if job.table == "records" and job.text_column == "note":
+            update_projections_if_available(
+                engine, embed_factory.get_embedding_column_name()
+            )
+
+    if cache is not None:
+        print(f"Embedding cache: {cache.stats()}")
+    return [results[job] for job in jobs]
+
+
+def print_summary(results):
+    """Print rows, duration and throughput per job."""
+    print(f"\n{'job':<45} {'rows':>8} {'seconds':>9} {'rows/sec':>9}  status")
+    for result in results:
+        rate = result["rows"] / result["seconds"] if result["seconds"] else 0.0
+        status = f"failed: {result['error']}" if result["error"] else "ok"
+        print(
+            f"{result['job']:<45} {result['rows']:>8} {result['seconds']:>9.1f} {rate:>9.1f}  {status}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run embedding backfill jobs.")
+    parser.add_argument(
+        "--jobs",
+        nargs="+",
+        type=EmbeddingJob.parse,
+        default=DEFAULT_JOBS,
+        help="jobs as table.column[:provider] (default: notes, scenarios and client profiles)",
+    )
+    parser.add_argument("--max-parallel", type=int, default=2)
+    parser.add_argument("--writer", choices=list(upsert.WRITERS), default="copy")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--embed-workers", type=int, default=1)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    results = run_jobs(
+        args.jobs,
+        max_parallel=args.max_parallel,
+        writer=args.writer,
+        batch_size=args.batch_size,
+        embed_workers=args.embed_workers,
+        use_cache=not args.no_cache,
+    )
+    print_summary(results)
+
+
+if __name__ == "__main__":
+    main()
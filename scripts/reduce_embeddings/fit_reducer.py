@@ -1,12 +1,17 @@
-import ast
 from pathlib import Path
 
 import joblib
 import numpy as np
 import pandas as pd
 from backend.database.db_connection import Database
+from backend.database.vector_types import fetch_embedding_matrix
 from backend.llm.embedding_visualizer import create_interactive_plot
-from sqlalchemy import text
+from backend.services.note_projections import (
+    get_active_model_path,
+    project_pending,
+    umap_model_path,
+)
+from backend.services.projectors import fit_projectors
 from sqlalchemy.engine import Engine
 from umap import UMAP
 
@@ -22,14 +27,15 @@ def get_embedding_data(
     embedding_column: str = "nfi_embedding",
     text_column: str = "note",
     category_column: str = "client_id",
-) -> pd.DataFrame:
+) -> tuple[pd.DataFrame, np.ndarray]:
+    # The embeddings are fetched in pgvector's binary format and decoded into one matrix
     query: str = f"""
-    SELECT id, {category_column} as category, {text_column} as text, {embedding_column} as embedding
+    SELECT id, {category_column} as category, {text_column} as text, vector_send({embedding_column}) as embedding
     FROM {table_name};
     """
     with engine.connect() as conn:
-        df: pd.DataFrame = pd.read_sql(text(query), conn)
-    return df
+        df, embeddings = fetch_embedding_matrix(conn, query)
+    return df, embeddings
 
 
 def main() -> None:
@@ -38,13 +44,15 @@ def main() -> None:
     text_column = "note"
     category_column = "category"
 
-    df: pd.DataFrame = get_embedding_data(
+    df, embeddings = get_embedding_data(
         table_name=table_name,
         embedding_column=embedding_column,
         text_column=text_column,
         category_column=category_column,
     )
-    df.dropna(inplace=True)
+    complete = df.notna().all(axis=1).to_numpy()
+    df = df[complete].reset_index(drop=True)
+    embeddings = embeddings[complete]
 
     n_components = 2
     random_state = 6
@@ -59,14 +67,22 @@ def main() -> None:
         n_jobs=1,  # Prevents UMAP from using multiple threads that can cause crashes in Docker
     )
 
-    df["embedding"] = df["embedding"].apply(ast.literal_eval)
-    embeddings: np.ndarray = np.vstack(df["embedding"])
     reduced_embeddings = reducer.fit_transform(embeddings)
 
-    joblib.dump(
-        value=reducer,
-        filename=model_folder / f"{table_name}_umap_2d.pkl",
-    )
+    model_path = model_folder / f"{table_name}_umap_2d.pkl"
+    joblib.dump(value=reducer, filename=model_path)
+
+    # Fast approximations of reducer.transform, fitted on the same 2D layout
+    # (compare them with scripts/benchmarks/bench_projectors.py)
+    for kind, path in fit_projectors(
+        embeddings, reduced_embeddings, model_path
+    ).items():
+        print(f"Saved {kind} projector to {path}")
+
+    # A refitted reducer invalidates the stored note projections; recompute them
+    if model_path == umap_model_path:
+        active = reducer if get_active_model_path() == umap_model_path else None
+        print(f"Projected {project_pending(engine, reducer=active)} notes to 2D")
 
     df["reduced_embeddings"] = list(reduced_embeddings)
 
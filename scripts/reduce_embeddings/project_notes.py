@@ -0,0 +1,50 @@
+"""
+This script writes the 2D UMAP coordinates of all notes to the note_projections table, using the
+reducer fitted by fit_reducer.py (or the projector selected by NOTE_PROJECTOR). Only notes
+without a current projection are processed: new notes, re-embedded notes, or all notes after
+the reducer was refitted. The embedding pipeline runs the same step incrementally after
+writing embeddings.
+
+Usage (with PYTHONPATH=app):
+    python scripts/reduce_embeddings/project_notes.py
+    python scripts/reduce_embeddings/project_notes.py --client mag003 --batch-size 2000
+"""
+
+import argparse
+import time
+
+from backend.database.db_connection import Database
+from backend.services.note_projections import (
+    get_active_model_path,
+    get_reducer_version,
+    load_reducer,
+    project_pending,
+)
+from backend.services.reducer_cache import get_reducer_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute 2D note projections.")
+    parser.add_argument("--client", default=None, help="only this client's notes")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = Database().get_engine()
+    model_path = get_active_model_path()
+    print(f"Reducer {model_path.name}, version {get_reducer_version(model_path)}")
+    start = time.perf_counter()
+    reducer = load_reducer()
+    print(f"Loaded reducer in {time.perf_counter() - start:.1f}s")
+    print(f"Reducer cache: {get_reducer_cache(model_path).stats()}")
+
+    start = time.perf_counter()
+    projected = project_pending(
+        engine, reducer=reducer, client_id=args.client, batch_size=args.batch_size
+    )
+    seconds = time.perf_counter() - start
+    rate = projected / seconds if seconds else 0.0
+    print(f"Projected {projected} notes in {seconds:.1f}s ({rate:.0f} notes/sec)")
+
+
+if __name__ == "__main__":
+    main()